@@ -1,4 +1,23 @@
-from http.server import BaseHTTPRequestHandler
+"""
+Scrape API.
+
+    POST /api/scrape[?site=a,b]       queue a scrape job -> 202 {job_id, ...}
+    GET  /api/scrape?job=ID           job status and progress (&results=1 adds
+                                      the latest scraped vehicles)
+    GET  /api/scrape?job=ID&stream=1  progress as server-sent events
+    GET  /api/scrape?jobs=1           every known job
+    GET  /api/scrape?wait=1           run one time-boxed slice in the request
+                                      (&run_id=... continues a run)
+
+A plain GET without job/jobs/wait also queues a job. Jobs run on an
+in-process queue, so they need a process that outlives the request: run
+`python api/scrape.py` locally. Serverless platforms freeze the function
+after responding and route polls to any instance, so there (VERCEL or
+AWS_LAMBDA_FUNCTION_NAME set, or SCRAPER_SERVERLESS=1) every scrape
+request runs a ?wait=1 slice and the job endpoints are disabled.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
 import os
 import sys
 import json
@@ -6,57 +25,144 @@ import json
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from scraper.vehicle_scraper import UniversalVehicleScraper
-from scraper.sheets_uploader import GoogleSheetsUploader
+# Only /tmp is writable on Vercel; it survives between warm invocations
+STATE_DIR = os.getenv('SCRAPER_STATE_DIR', '/tmp/scraper')
+os.environ.setdefault('SCRAPER_CACHE_DIR', f'{STATE_DIR}/http')
+os.environ.setdefault('SCRAPER_FINGERPRINTS', f'{STATE_DIR}/fingerprints.json')
+os.environ.setdefault('SCRAPER_FRONTIER', f'{STATE_DIR}/frontier.db')
+os.environ.setdefault('SCRAPER_OUTPUTS', f'sqlite:{STATE_DIR}/inventory.db')
+
+# Only the light job bookkeeping loads at cold start; scraper.runner (and the
+# crawl stack behind it) is imported by the first request that scrapes
+from scraper.jobs import JobConflict, JobQueue
+
+
+def run_scrape(sites, **kwargs):
+    from scraper.runner import run_scrape
+    return run_scrape(sites, **kwargs)
+
+
+SERVERLESS = bool(os.getenv('VERCEL') or os.getenv('AWS_LAMBDA_FUNCTION_NAME')
+                  or os.getenv('SCRAPER_SERVERLESS') == '1')
+
+# No job threads where they would be frozen between invocations
+JOBS = None if SERVERLESS else JobQueue(run_scrape, workers=int(os.getenv('SCRAPER_JOB_WORKERS', '2')))
+
+
+def run_options(run_id=None, time_budget=None):
+    """run_scrape keyword arguments from the environment"""
+    from scraper.runner import options_from_env
+    return dict(
+        options=options_from_env(),
+        outputs=os.getenv('SCRAPER_OUTPUTS'),
+        google_creds=os.getenv('GOOGLE_CREDENTIALS'),
+        sheet_id=os.getenv('GOOGLE_SHEET_ID'),
+        sheets_per_dealer=os.getenv('SHEETS_PER_DEALER', '0') == '1',
+        processes=1,
+        frontier_path=os.getenv('SCRAPER_FRONTIER'),
+        run_id=run_id,
+        time_budget=time_budget
+    )
+
 
 class handler(BaseHTTPRequestHandler):
+    def send_json(self, status, payload):
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode())
+
+    def do_POST(self):
+        self.route()
+
     def do_GET(self):
-        """Handle GET requests"""
+        self.route()
+
+    def route(self):
         try:
-            # URLs to scrape
-            urls = [
-                "https://www.reddeertoyota.com/inventory/new/",
-                "https://www.reddeertoyota.com/inventory/new/?page=2",
-                "https://www.reddeertoyota.com/inventory/new/?page=3",
-                "https://www.reddeertoyota.com/inventory/used/",
-                "https://www.reddeertoyota.com/inventory/used/?page=2",
-                "https://www.reddeertoyota.com/inventory/used/?page=3"
-            ]
-            
-            # Scrape vehicles
-            scraper = UniversalVehicleScraper()
-            vehicles = scraper.scrape_inventory_pages(urls)
-            
-            if not vehicles:
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': 'No vehicles scraped'}).encode())
-                return
-            
-            # Upload to Google Sheets
-            google_creds = os.getenv('GOOGLE_CREDENTIALS')
-            sheet_id = os.getenv('GOOGLE_SHEET_ID')
-            
-            if google_creds and sheet_id:
-                uploader = GoogleSheetsUploader(google_creds, sheet_id)
-                uploader.upload_vehicles(vehicles)
-            
-            # Return success
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            response = {
-                'success': True,
-                'vehicles_scraped': len(vehicles),
-                'message': f'Successfully scraped {len(vehicles)} vehicles and uploaded to Google Sheets'
-            }
-            
-            self.wfile.write(json.dumps(response).encode())
-            
+            query = parse_qs(urlsplit(self.path).query)
+            param = lambda name: query.get(name, [None])[0]
+            if SERVERLESS and (param('job') or param('jobs')):
+                return self.send_json(400, {'error': "Jobs need a long-running server; this deployment "
+                                                    "scrapes in the request (use ?wait=1&run_id=...)"})
+            if param('job'):
+                job = JOBS.get(param('job'))
+                if job is None:
+                    return self.send_json(404, {'error': f"Unknown job {param('job')}"})
+                if param('stream'):
+                    return self.stream(job.id)
+                return self.send_json(200, job.to_dict(results=bool(param('results'))))
+            if param('jobs'):
+                return self.send_json(200, {'jobs': [job.to_dict() for job in JOBS.list()]})
+
+            from scraper.runner import sites_from_env
+            # Also registers SCRAPER_SITES_FILE profiles
+            sites = sites_from_env()
+            if param('site'):
+                sites = [name for name in param('site').split(',') if name]
+            elif os.getenv('SCRAPER_SITE'):
+                sites = [os.getenv('SCRAPER_SITE')]
+
+            if param('wait') or SERVERLESS:
+                return self.run_slice(sites, param('run_id'))
+
+            try:
+                job = JOBS.submit(sites, **run_options(run_id=param('run_id')))
+            except JobConflict as e:
+                return self.send_json(409, {'error': str(e)})
+            self.send_json(202, {
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': f'/api/scrape?job={job.id}',
+                'events_url': f'/api/scrape?job={job.id}&stream=1'
+            })
+
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'error': str(e)}).encode())
+            self.send_json(500, {'error': str(e)})
+
+    def run_slice(self, sites, run_id):
+        """Scrape a time-boxed slice of the frontier inside this request"""
+        result = run_scrape(sites, **run_options(run_id, float(os.getenv('SCRAPER_TIME_BUDGET', '45'))))
+        self.send_json(500 if result['error'] else 200, {
+            'success': not result['error'],
+            'run_id': result['run_id'],
+            'complete': result['complete'],
+            'vehicles_scraped': result['vehicles'],
+            'progress': result.get('progress'),
+            'error': result['error'],
+            'message': (f"Run {result['run_id']} complete" if result['complete'] else
+                        f"Run {result['run_id']} finished with failed pages; sold vehicles were kept"
+                        if result['finished'] else
+                        f"Run {result['run_id']} continues; call again with ?wait=1&run_id={result['run_id']}")
+        })
+
+    def stream(self, job_id):
+        """Server-sent events: 'progress' on every update, then 'done' or 'failed'"""
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        try:
+            for event, data in JOBS.events(job_id):
+                if event is None:
+                    self.wfile.write(b': keep-alive\n\n')
+                else:
+                    self.wfile.write(f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+if __name__ == '__main__':
+    import argparse
+    import logging
+    parser = argparse.ArgumentParser(description='Serve the scrape API with an in-process job queue')
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '8000')))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), handler)
+    print(f"Scrape API on http://127.0.0.1:{args.port}/api/scrape")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,122 @@
+"""
+Per-page parse/extract timing on saved vehicle pages, before and after the
+single-pass extractor.
+
+    python benchmarks/bench_extract.py [glob] [--repeat N]
+
+Defaults to the debug_output/vehicle_page_*.html files the scraper saves in
+debug mode. Also checks that both implementations extract the same fields.
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from scraper.extractor import scan_page, select_price
+
+
+def legacy_extract(soup):
+    """
+    The multi-scan extraction scrape_vehicle used before scan_page. `$` text
+    inside <script>/<style>/comments is skipped, as scan_page does, so the
+    two are compared on the same candidates.
+    """
+    page_text = soup.get_text()
+    fields = {'title': '', 'price': '', 'stock': '', 'vin': '', 'mileage': ''}
+
+    h1 = soup.find('h1')
+    if h1:
+        fields['title'] = ' '.join(h1.get_text().strip().split())
+
+    price_texts = []
+    for elem in soup.find_all(string=re.compile(r'\$')):
+        if type(elem).__name__ in ('Script', 'Stylesheet', 'TemplateString', 'Comment'):
+            continue
+        text = ' '.join(elem.parent.get_text().strip().split())
+        if text and len(text) < 200:
+            price_texts.append(text)
+    for pt in price_texts:
+        if 'msrp' not in pt.lower() and '$' in pt:
+            for num in re.findall(r'\$?\s*([\d,]+)', pt.replace(',', '')):
+                if len(num) >= 5:
+                    fields['price'] = num
+                    break
+            if fields['price']:
+                break
+
+    stock_match = re.search(r'(?:Stock|Stk)\s*#?\s*:?\s*([A-Z0-9-]+)', page_text, re.I)
+    if stock_match:
+        fields['stock'] = stock_match.group(1)
+    vin_match = re.search(r'\b([A-HJ-NPR-Z0-9]{17})\b', page_text)
+    if vin_match:
+        fields['vin'] = vin_match.group(1).upper()
+    km_match = re.search(r'([\d,]+)\s*km', page_text, re.I)
+    if km_match:
+        fields['mileage'] = km_match.group(1).replace(',', '')
+    return fields
+
+
+def single_pass_extract(soup):
+    scan = scan_page(soup)
+    price, _ = select_price(scan.price_texts)
+    return {'title': scan.title, 'price': price, 'stock': scan.stock,
+            'vin': scan.vin, 'mileage': scan.mileage}
+
+
+def best_of(repeat, func):
+    """Best-of-`repeat` wall time of func() and its last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pattern', nargs='?', default='debug_output/vehicle_page_*.html')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(args.pattern))
+    if not paths:
+        print(f"No fixtures match {args.pattern}; run the scraper with debug_mode on first")
+        return 1
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+
+    n = len(pages)
+    parse_time, soups = best_of(args.repeat, lambda: [BeautifulSoup(html, 'html.parser') for html in pages])
+    legacy_time, legacy_results = best_of(args.repeat, lambda: [legacy_extract(soup) for soup in soups])
+    new_time, new_results = best_of(args.repeat, lambda: [single_pass_extract(soup) for soup in soups])
+
+    print(f"{n} pages, best of {args.repeat}")
+    print(f"  html.parser parse        : {parse_time / n * 1000:8.2f} ms/page")
+    print(f"  legacy multi-scan extract: {legacy_time / n * 1000:8.2f} ms/page "
+          f"({(parse_time + legacy_time) / n * 1000:.2f} with parse)")
+    print(f"  single-pass extract      : {new_time / n * 1000:8.2f} ms/page "
+          f"({(parse_time + new_time) / n * 1000:.2f} with parse)")
+    print(f"  extraction speedup       : {legacy_time / new_time:8.2f}x")
+
+    mismatches = 0
+    for path, old, new in zip(paths, legacy_results, new_results):
+        for field in old:
+            if old[field] != new[field]:
+                mismatches += 1
+                print(f"  MISMATCH {os.path.basename(path)} {field}: {old[field]!r} != {new[field]!r}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
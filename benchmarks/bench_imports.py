@@ -0,0 +1,95 @@
+"""
+Cold-start import guard for the serverless entry point.
+
+    python benchmarks/bench_imports.py [target ...] [--budget-ms 80] [--repeat 5]
+
+Imports each target (a module name, or a .py file such as the default
+api/scrape.py) in fresh interpreters under `python -X importtime` and
+reports the best import time and the slowest imports behind it. Fails
+(exit 1) when a target goes over --budget-ms or loads one of the --forbid
+packages at import time: those must stay behind the lazy imports of the
+stage that uses them.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy dependencies no cold start should load before a scrape begins
+FORBIDDEN = ('requests', 'urllib3', 'bs4', 'lxml', 'selectolax', 'google', 'googleapiclient',
+             'gspread', 'multiprocessing', 'dotenv')
+
+MARKER = '-- target --'
+
+PROBE = '''
+import json, sys, time
+sys.stderr.write({marker!r} + '\\n')
+sys.stderr.flush()
+started = time.perf_counter()
+target = {target!r}
+if target.endswith('.py'):
+    import importlib.util
+    spec = importlib.util.spec_from_file_location('cold_start_target', target)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+else:
+    __import__(target)
+elapsed = time.perf_counter() - started
+loaded = sorted({{name.split('.')[0] for name in sys.modules}})
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': loaded}}))
+'''
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] the target imported, from -X importtime output"""
+    rows = []
+    # Everything before the marker is interpreter startup and the probe itself
+    for line in stderr.partition(MARKER)[2].splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def probe(target):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE.format(marker=MARKER, target=target)],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout), parse_importtime(out.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='*', default=['api/scrape.py'])
+    parser.add_argument('--budget-ms', type=float, default=80.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=12)
+    parser.add_argument('--forbid', default=','.join(FORBIDDEN),
+                        help='comma list of top-level packages that must not load')
+    args = parser.parse_args()
+    forbidden = {name for name in args.forbid.split(',') if name}
+
+    failures = 0
+    for target in args.targets:
+        runs = [probe(target) for _ in range(args.repeat)]
+        best, rows = min(runs, key=lambda run: run[0]['ms'])
+        leaked = sorted(forbidden & set(best['loaded']))
+        over = best['ms'] > args.budget_ms
+        status = 'FAIL' if leaked or over else 'ok'
+        print(f"{target}: {best['ms']:.1f} ms best of {args.repeat} (budget {args.budget_ms:.0f} ms) {status}")
+
+        print(f"  {'module':<45} {'self ms':>8} {'cumul ms':>9}")
+        for name, self_us, cumulative_us, depth in sorted(rows, key=lambda row: -row[2])[:args.top]:
+            print(f"  {'  ' * depth + name:<45} {self_us / 1000:>8.1f} {cumulative_us / 1000:>9.1f}")
+        if leaked:
+            print(f"  loads {', '.join(leaked)} at import time; move those imports into the stage that uses them")
+        failures += status == 'FAIL'
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Compare HTML parser backends on stored pages.
+
+    python benchmarks/bench_parsers.py [glob] [--repeat N]
+
+For every installed backend, parses each fixture and runs the same link and
+field extraction the scraper does, in a fresh subprocess so peak RSS is
+per-backend. Reports pages/second, peak memory, and any page where a
+backend's links, fields or listing cards differ from html.parser. The
+built-in CASES pages (tree shapes that broke a backend before) are always
+checked along with the fixtures.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.html_backend import available_backends, parse_html
+from scraper.vehicle_scraper import VehicleScraper
+
+
+# name -> page; compared on every backend whatever the fixture glob matches
+CASES = {
+    # Price as bare text directly inside the card element
+    'case:card-price-text': (
+        '<html><body><main>'
+        '<div class="card">$25,999 <a href="/inventory/used/2019-toyota-camry-le-id1234567">'
+        '2019 Toyota Camry LE</a> Stock: A123</div>'
+        '<div class="card"><h3>2020 Toyota RAV4</h3>$31,500'
+        '<a href="/inventory/new/2020-toyota-rav4-id7654321">View</a></div>'
+        '</main></body></html>'
+    ),
+}
+
+
+def peak_rss_kb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def run_backend(backend, paths, repeat):
+    """Worker side: time one backend and return its results as a dict"""
+    logging.disable(logging.INFO)
+    scraper = VehicleScraper(max_workers=1, parser=backend)
+    scraper.debug_mode = False
+
+    pages = []
+    for path in paths:
+        if path in CASES:
+            pages.append(CASES[path].encode('utf-8'))
+            continue
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    baseline_kb = peak_rss_kb()
+
+    best = None
+    results = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path, html in zip(paths, pages):
+            doc = parse_html(html, backend)
+            links = sorted(scraper.extract_links(doc))
+            cards = scraper.extract_cards(doc)
+            data = scraper.extract_vehicle(doc, 'file://' + os.path.abspath(path))
+            results[path] = {'links': links, 'cards': cards, 'data': data}
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        'backend': backend,
+        'pages_per_second': len(pages) / best,
+        'ms_per_page': best / len(pages) * 1000,
+        'peak_rss_kb': peak_rss_kb(),
+        'rss_growth_kb': peak_rss_kb() - baseline_kb,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pattern', nargs='?', default='debug_output/*.html')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(args.pattern))
+
+    if args.worker:
+        json.dump(run_backend(args.worker, paths + list(CASES), args.repeat), sys.stdout)
+        return 0
+    if not paths:
+        print(f"No fixtures match {args.pattern}; checking the built-in cases only")
+    paths += list(CASES)
+
+    reports = []
+    for backend in available_backends():
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), args.pattern,
+             '--repeat', str(args.repeat), '--worker', backend],
+            check=True, capture_output=True, text=True
+        ).stdout
+        reports.append(json.loads(out))
+
+    print(f"{len(paths)} pages, best of {args.repeat}")
+    print(f"  {'backend':<12} {'pages/s':>9} {'ms/page':>9} {'peak RSS':>10} {'RSS growth':>11}")
+    for r in reports:
+        print(f"  {r['backend']:<12} {r['pages_per_second']:>9.1f} {r['ms_per_page']:>9.2f} "
+              f"{r['peak_rss_kb'] / 1024:>8.1f}MB {r['rss_growth_kb'] / 1024:>9.1f}MB")
+
+    reference = reports[0]['results']
+    mismatches = 0
+    for r in reports[1:]:
+        for path, expected in reference.items():
+            got = r['results'][path]
+            if got['links'] != expected['links']:
+                mismatches += 1
+                print(f"  MISMATCH {r['backend']} {os.path.basename(path)}: links differ")
+            if got['cards'] != expected['cards']:
+                mismatches += 1
+                print(f"  MISMATCH {r['backend']} {os.path.basename(path)}: listing cards differ")
+            for field, value in expected['data'].items():
+                if got['data'].get(field) != value:
+                    mismatches += 1
+                    print(f"  MISMATCH {r['backend']} {os.path.basename(path)} {field}: "
+                          f"{value!r} != {got['data'].get(field)!r}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
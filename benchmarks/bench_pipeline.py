@@ -0,0 +1,203 @@
+"""
+End-to-end pipeline benchmark, fully offline.
+
+    python benchmarks/bench_pipeline.py [--fixtures DIR] [--latency 0.02] [--repeat 3]
+    python benchmarks/bench_pipeline.py --save-baseline     # after a known-good change
+
+Serves fixtures from benchmarks/fake_dealer.py (synthetic pages unless
+--fixtures points at a recorded site) and a benchmarks/fake_sheets.py
+backend, then runs the real crawl -> SheetsSink -> uploader pipeline in a
+fresh subprocess per repetition. Reports vehicles/second, p50/p99 per
+vehicle page, CPU seconds and peak RSS of the pipeline process (medians of
+the repetitions), checks every vehicle reached the sheet, and compares
+with the stored baseline: a change worse than --tolerance exits 1, as
+does a missing baseline file. benchmarks/baseline.json holds the numbers
+for the default synthetic settings.
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_dealer import FakeDealerServer, load_fixtures, synthetic_fixtures
+from benchmarks.fake_sheets import FakeSheetsServer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Result -> whether bigger is better
+COMPARED = {
+    'vehicles_per_second': True,
+    'p50_ms': False,
+    'p99_ms': False,
+    'cpu_seconds': False,
+    'peak_rss_mb': False,
+}
+
+
+def peak_rss_kb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def run_worker(config):
+    """Worker side: one pipeline run against the servers named in `config`"""
+    import requests
+
+    from scraper.metrics import Metrics
+    from scraper.orchestrator import DealerStream
+    from scraper.sheets_uploader import GoogleSheetsUploader
+    from scraper.sinks import SheetsSink, ThreadedSink, run_pipeline
+    from scraper.sites import SiteProfile
+
+    logging.disable(logging.WARNING)
+    site = SiteProfile('bench', config['base_url'], requests_per_second=config['rate'], **config['profile'])
+    uploader = GoogleSheetsUploader(None, config['sheet_id'], api_base=config['sheets_api'],
+                                    session=requests.Session())
+    sink = ThreadedSink(SheetsSink(uploader, batch_size=config['batch_size']))
+    stream = DealerStream([site], processes=1, options=dict(
+        max_workers=config['workers'], burst=config['workers'], parser=config['parser'],
+        listing_only=config['listing_only'], quiet=True))
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    count = run_pipeline(stream, [sink])
+    wall = time.perf_counter() - started
+    after = resource.getrusage(resource.RUSAGE_SELF)
+
+    metrics = Metrics()
+    for report in stream.reports:
+        metrics.merge(report.get('metrics'))
+    report = metrics.report()
+    pages = report['timings'].get('vehicle_seconds', {})
+    return {
+        'vehicles': count,
+        'complete': stream.complete,
+        'wall_seconds': wall,
+        'vehicles_per_second': count / wall if wall else 0.0,
+        'p50_ms': pages.get('p50_ms'),
+        'p99_ms': pages.get('p99_ms'),
+        'cpu_seconds': (after.ru_utime - usage.ru_utime) + (after.ru_stime - usage.ru_stime),
+        'peak_rss_mb': peak_rss_kb() / 1024,
+        'requests': sum(value for key, value in report['counters'].items() if key.startswith('http_responses')),
+        'sheets_failed': sink.failed,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against the baseline; return the names that regressed"""
+    regressed = []
+    print(f"\nAgainst baseline (tolerance {tolerance:.0%}):")
+    for name, higher_is_better in COMPARED.items():
+        old, new = baseline.get(name), results.get(name)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = ''
+        if worse > tolerance:
+            flag = '  REGRESSION'
+            regressed.append(name)
+        elif worse < -tolerance:
+            flag = '  improved'
+        print(f"  {name:<20} {old:>10.2f} -> {new:>10.2f}  {change:+7.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='recorded fixture directory (default: synthetic pages)')
+    parser.add_argument('--vehicles', type=int, default=120, help='synthetic inventory size')
+    parser.add_argument('--latency', type=float, default=0.02, help='dealer response delay, seconds')
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of dealer requests failing')
+    parser.add_argument('--sheets-latency', type=float, default=0.05)
+    parser.add_argument('--sheets-error-rate', type=float, default=0.0)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=1000.0, help='requests/second budget for the fake host')
+    parser.add_argument('--batch-size', type=int, default=50, help='Sheets rows per batch')
+    parser.add_argument('--parser', default='html.parser')
+    parser.add_argument('--listing-only', action='store_true')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        json.dump(run_worker(json.loads(args.worker)), sys.stdout)
+        return 0
+
+    if args.fixtures:
+        pages, origin, profile = load_fixtures(args.fixtures)
+    else:
+        pages, origin, profile = synthetic_fixtures(args.vehicles)
+    dealer = FakeDealerServer(pages, origin, latency=args.latency, jitter=args.jitter,
+                              error_rate=args.error_rate, seed=1).start()
+    sheets = FakeSheetsServer(latency=args.sheets_latency, error_rate=args.sheets_error_rate, seed=1).start()
+    # What the numbers depend on; a baseline from other settings isn't comparable
+    settings = {
+        'fixtures': os.path.abspath(args.fixtures) if args.fixtures else f'synthetic:{args.vehicles}',
+        'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+        'sheets_latency': args.sheets_latency, 'sheets_error_rate': args.sheets_error_rate,
+        'workers': args.workers, 'rate': args.rate, 'batch_size': args.batch_size,
+        'parser': args.parser, 'listing_only': args.listing_only,
+    }
+
+    runs = []
+    problems = 0
+    try:
+        for n in range(args.repeat):
+            config = dict(settings, base_url=dealer.base_url, profile=profile,
+                          sheets_api=sheets.api_base, sheet_id=f'bench-{n}')
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', json.dumps(config)],
+                                 check=True, capture_output=True, text=True).stdout
+            run = json.loads(out)
+            rows = len(sheets.spreadsheet(f'bench-{n}').values("'Vehicle Inventory'")) - 1
+            if rows != run['vehicles'] or run['sheets_failed']:
+                problems += 1
+                print(f"  run {n + 1}: {run['vehicles']} vehicles scraped but {rows} rows in the sheet")
+            runs.append(run)
+    finally:
+        dealer.stop()
+        sheets.stop()
+
+    results = {name: statistics.median(run[name] for run in runs if run[name] is not None)
+               for name in ('vehicles', 'wall_seconds', 'requests', *COMPARED)}
+    print(f"{len(pages)} fixture pages, {results['vehicles']:.0f} vehicles, median of {args.repeat} runs")
+    print(f"  {'run':<5} {'vehicles/s':>11} {'p50 ms':>8} {'p99 ms':>8} {'CPU s':>7} {'peak RSS':>10}")
+    for n, run in enumerate(runs, 1):
+        print(f"  {n:<5} {run['vehicles_per_second']:>11.1f} {run['p50_ms'] or 0:>8.1f} {run['p99_ms'] or 0:>8.1f} "
+              f"{run['cpu_seconds']:>7.2f} {run['peak_rss_mb']:>8.1f}MB")
+    print(f"  dealer: {dealer.stats}")
+    print(f"  sheets: {sheets.stats}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'settings': settings, 'results': results}, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 1 if problems else 0
+
+    if not os.path.exists(args.baseline):
+        # Not comparing is not passing: a lost baseline must not go unnoticed
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to store one")
+        return 1
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline['settings'] != settings:
+        print(f"\nBaseline {args.baseline} was taken with other settings; not comparing")
+        return 1 if problems else 0
+    regressed = compare(results, baseline['results'], args.tolerance)
+    return 1 if problems or regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
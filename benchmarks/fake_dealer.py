@@ -0,0 +1,234 @@
+"""
+Local dealer website serving recorded (or synthetic) HTML fixtures.
+
+    python benchmarks/fake_dealer.py [--fixtures DIR] [--port 8091] [--latency 0.05]
+
+Fixture directories come from benchmarks/record_fixtures.py: a
+manifest.json (site profile, recorded origin, URL path -> file) and the raw
+page bodies. Links to the recorded origin are rewritten to this server.
+Without --fixtures, a synthetic inventory of --vehicles vehicles is served
+(paginated grid pages, detail pages of realistic weight, half with JSON-LD).
+
+Latency (plus random jitter) is added to every response and a share of
+requests can fail with 500/503, so retries and slow hosts are measurable
+offline.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+SYNTHETIC_ORIGIN = 'http://dealer.fixture'
+
+MODELS = (('Toyota', 'Camry', 'SE'), ('Toyota', 'RAV4', 'XLE AWD'), ('Toyota', 'Corolla', 'LE'),
+          ('Toyota', 'Tacoma', 'TRD Off-Road'), ('Toyota', 'Highlander', 'Limited'),
+          ('Honda', 'Civic', 'EX'), ('Ford', 'F-150', 'XLT SuperCrew'))
+COLORS = ('Midnight Black', 'Super White', 'Celestial Silver', 'Blueprint', 'Supersonic Red')
+VIN_CHARS = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+
+
+def page_key(path):
+    """Fixture key of a request path: path plus query, without the fragment"""
+    parts = urlsplit(path)
+    return parts.path + (f'?{parts.query}' if parts.query else '')
+
+
+def load_fixtures(directory):
+    """(pages {key: bytes}, origin, profile kwargs) from a recorded fixture directory"""
+    with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    pages = {}
+    for key, filename in manifest['pages'].items():
+        with open(os.path.join(directory, filename), 'rb') as f:
+            pages[key] = f.read()
+    return pages, manifest['origin'], manifest.get('profile', {})
+
+
+def page_chrome(rng):
+    """Header navigation, footer and inline script of a typical dealer template"""
+    nav = ''.join(f'<li><a href="/{section}/{n}/">{section.title()} {n}</a></li>'
+                  for section in ('specials', 'service', 'parts', 'finance', 'about') for n in range(30))
+    script = 'window.dealerConfig = ' + json.dumps(
+        {f'feature_{n}': rng.random() for n in range(400)}) + ';'
+    footer = ''.join(f'<p class="disclaimer">Disclaimer {n}: prices exclude taxes and licensing. '
+                     f'Vehicle may not be exactly as shown.</p>' for n in range(20))
+    return nav, script, footer
+
+
+def synthetic_vehicle(rng, index):
+    make, model, trim = rng.choice(MODELS)
+    year = rng.randint(2016, 2025)
+    return {
+        'index': index,
+        'year': year, 'make': make, 'model': model, 'trim': trim,
+        'condition': 'new' if year >= 2025 else 'used',
+        'price': rng.randint(18, 75) * 1000 - 5,
+        'msrp': rng.randint(80, 90) * 1000,
+        'mileage': 0 if year >= 2025 else rng.randint(5, 180) * 1000,
+        'stock': f'T{index:05d}',
+        'vin': ''.join(rng.choice(VIN_CHARS) for _ in range(17)),
+        'color': rng.choice(COLORS),
+    }
+
+
+def synthetic_fixtures(vehicles=120, per_page=24, seed=0):
+    """(pages, origin, profile kwargs) of a generated dealer site"""
+    rng = random.Random(seed)
+    nav, script, footer = page_chrome(rng)
+    stock = [synthetic_vehicle(rng, index) for index in range(vehicles)]
+    pages = {}
+
+    def wrap(title, body):
+        return (f'<!DOCTYPE html><html><head><title>{title}</title><script>{script}</script></head>'
+                f'<body><header><ul class="nav">{nav}</ul></header><main>{body}</main>'
+                f'<footer>{footer}</footer></body></html>').encode('utf-8')
+
+    for condition in ('new', 'used'):
+        listed = [v for v in stock if v['condition'] == condition]
+        for vehicle in listed:
+            vehicle['path'] = (f"/inventory/{condition}/{vehicle['year']}-{vehicle['make']}-{vehicle['model']}"
+                               f"-{vehicle['stock']}/").lower()
+        page_count = max(1, -(-len(listed) // per_page))
+        for page in range(1, page_count + 1):
+            cards = ''.join(
+                f'<div class="vehicle-card"><a href="{SYNTHETIC_ORIGIN}{v["path"]}"><h3>{v["year"]} {v["make"]} '
+                f'{v["model"]} {v["trim"]}</h3></a><img src="/photos/{v["stock"]}.jpg">'
+                f'<span class="price">${v["price"]:,}</span><span>Stock #: {v["stock"]}</span></div>'
+                for v in listed[(page - 1) * per_page:page * per_page])
+            pager = ''.join(f'<a href="/inventory/{condition}/?page={n}">{n}</a>' for n in range(1, page_count + 1))
+            if page < page_count:
+                pager += f'<a rel="next" href="/inventory/{condition}/?page={page + 1}">Next</a>'
+            body = f'<h1>{len(listed)} vehicles</h1><div class="grid">{cards}</div><nav class="pager">{pager}</nav>'
+            html = wrap(f'{condition.title()} inventory', body)
+            pages[f'/inventory/{condition}/?page={page}'] = html
+            if page == 1:
+                pages[f'/inventory/{condition}/'] = html
+
+    for vehicle in stock:
+        title = f"{vehicle['year']} {vehicle['make']} {vehicle['model']} {vehicle['trim']}"
+        json_ld = ''
+        if vehicle['index'] % 2 == 0:
+            json_ld = '<script type="application/ld+json">' + json.dumps({
+                '@context': 'https://schema.org', '@type': 'Car', 'name': title,
+                'vehicleIdentificationNumber': vehicle['vin'], 'sku': vehicle['stock'],
+                'brand': {'@type': 'Brand', 'name': vehicle['make']}, 'model': vehicle['model'],
+                'vehicleModelDate': str(vehicle['year']), 'color': vehicle['color'],
+                'mileageFromOdometer': {'@type': 'QuantitativeValue', 'value': vehicle['mileage'], 'unitCode': 'KMT'},
+                'offers': {'@type': 'Offer', 'price': vehicle['price'], 'priceCurrency': 'CAD'},
+            }) + '</script>'
+        specs = ''.join(f'<tr><th>Spec {n}</th><td>Value {rng.randint(0, 999)}</td></tr>' for n in range(60))
+        similar = ''.join(f'<div class="similar"><a href="{other["path"]}">{other["model"]}</a>'
+                          f'<span>${other["price"]:,}</span></div>' for other in rng.sample(stock, min(6, len(stock))))
+        body = (f'{json_ld}<h1>{title}</h1><div class="pricing"><span>MSRP ${vehicle["msrp"]:,}</span>'
+                f'<span class="final-price">Sale Price ${vehicle["price"]:,}</span></div>'
+                f'<ul><li>Stock #: {vehicle["stock"]}</li><li>VIN: {vehicle["vin"]}</li>'
+                f'<li>{vehicle["mileage"]:,} km</li><li>Exterior: {vehicle["color"]}</li></ul>'
+                f'<table class="specs">{specs}</table><section>{similar}</section>')
+        pages[vehicle['path']] = wrap(title, body)
+
+    profile = {'brands': sorted({make for make, _, _ in MODELS})}
+    return pages, SYNTHETIC_ORIGIN, profile
+
+
+class FakeDealerServer:
+    """Serve fixture pages over HTTP/1.1 keep-alive, with injected latency and errors"""
+
+    def __init__(self, pages, origin, port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors_injected': 0, 'not_found': 0, 'bytes_sent': 0}
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self.handler_class())
+        self.httpd.daemon_threads = True
+        origin = origin.rstrip('/').encode('utf-8')
+        base = self.base_url.encode('utf-8')
+        self.pages = {key: body.replace(origin, base) for key, body in pages.items()}
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def delay(self):
+        with self.lock:
+            return self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def inject_error(self):
+        with self.lock:
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.stats['errors_injected'] += 1
+                return self.random.choice((500, 503))
+        return None
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body, content_type='text/html; charset=utf-8'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with server.lock:
+                    server.stats['bytes_sent'] += len(body)
+
+            def do_GET(self):
+                with server.lock:
+                    server.stats['requests'] += 1
+                delay = server.delay()
+                if delay:
+                    time.sleep(delay)
+                status = server.inject_error()
+                if status:
+                    return self.reply(status, b'injected error', 'text/plain')
+                body = server.pages.get(page_key(self.path))
+                if body is None:
+                    with server.lock:
+                        server.stats['not_found'] += 1
+                    return self.reply(404, b'not found', 'text/plain')
+                self.reply(200, body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='recorded fixture directory (default: synthetic pages)')
+    parser.add_argument('--vehicles', type=int, default=120)
+    parser.add_argument('--port', type=int, default=8091)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    pages, origin, profile = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures(args.vehicles)
+    server = FakeDealerServer(pages, origin, args.port, args.latency, args.jitter, args.error_rate)
+    print(f"Fake dealer on {server.base_url} ({len(pages)} pages); site profile extras: {json.dumps(profile)}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+In-memory fake of the Sheets v4 endpoints the uploader uses.
+
+    python benchmarks/fake_sheets.py [--port 8090] [--error-rate 0.1]
+
+then run the uploader with SHEETS_API_BASE=http://127.0.0.1:8090/v4. Supports
+spreadsheet metadata, values GET and the batchUpdate requests sheet_sync
+emits (updateCells, appendCells, deleteDimension, appendDimension,
+repeatCell, addSheet). Can inject 429/503 responses and rejects payloads
+over the real 10MB limit, so batching and backoff are exercised offline.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+MAX_PAYLOAD_BYTES = 10 * 1024 * 1024
+PATH_RE = re.compile(r'^/v4/spreadsheets/(?P<id>[^/:]+)(?P<rest>.*)$')
+
+
+class FakeSpreadsheet:
+    def __init__(self, title='Fake Inventory'):
+        self.title = title
+        self.sheets = []   # dicts: properties + 'rows'
+        self.lock = threading.Lock()
+
+    def sheet(self, sheet_id=None, title=None):
+        for sheet in self.sheets:
+            if sheet['properties']['sheetId'] == sheet_id or sheet['properties']['title'] == title:
+                return sheet
+        raise KeyError(sheet_id if title is None else title)
+
+    def metadata(self):
+        return {'properties': {'title': self.title},
+                'sheets': [{'properties': sheet['properties']} for sheet in self.sheets]}
+
+    def values(self, cell_range):
+        title = cell_range.split('!')[0].strip("'")
+        rows = self.sheet(title=title)['rows']
+        # Like the real API: trailing empty cells and rows are trimmed
+        trimmed = [row[:max([i + 1 for i, v in enumerate(row) if v] or [0])] for row in rows]
+        while trimmed and not trimmed[-1]:
+            trimmed.pop()
+        return trimmed
+
+    def apply(self, request):
+        kind, body = next(iter(request.items()))
+        if kind == 'addSheet':
+            properties = dict(body['properties'])
+            properties.setdefault('sheetId', len(self.sheets) + 1000)
+            properties.setdefault('gridProperties', {'rowCount': 1000, 'columnCount': 26})
+            self.sheets.append({'properties': properties, 'rows': []})
+            return {'addSheet': {'properties': properties}}
+        if kind == 'updateCells':
+            sheet = self.sheet(body['start']['sheetId'])
+            self.write(sheet, body['start'].get('rowIndex', 0), body['rows'])
+        elif kind == 'appendCells':
+            sheet = self.sheet(body['sheetId'])
+            last = max([i + 1 for i, row in enumerate(sheet['rows']) if any(row)] or [0])
+            self.write(sheet, last, body['rows'])
+        elif kind == 'deleteDimension':
+            target = body['range']
+            sheet = self.sheet(target['sheetId'])
+            if target['dimension'] == 'ROWS':
+                del sheet['rows'][target['startIndex']:target['endIndex']]
+        elif kind == 'appendDimension':
+            grid = self.sheet(body['sheetId'])['properties']['gridProperties']
+            key = 'columnCount' if body['dimension'] == 'COLUMNS' else 'rowCount'
+            grid[key] = grid.get(key, 0) + body['length']
+        elif kind not in ('repeatCell', 'updateSheetProperties'):
+            raise ValueError(f'unsupported request {kind}')
+        return {}
+
+    def write(self, sheet, start, rows):
+        grid = sheet['properties']['gridProperties']
+        for offset, row in enumerate(rows):
+            values = [cell.get('userEnteredValue', {}).get('stringValue', '') for cell in row.get('values', [])]
+            if len(values) > grid.get('columnCount', 26):
+                raise ValueError('write past the last column')
+            index = start + offset
+            while len(sheet['rows']) <= index:
+                sheet['rows'].append([])
+            sheet['rows'][index] = values
+        grid['rowCount'] = max(grid.get('rowCount', 0), len(sheet['rows']))
+
+
+class FakeSheetsServer:
+    """Serve FakeSpreadsheets over HTTP; counts calls and injected errors"""
+
+    def __init__(self, port=0, error_rate=0.0, latency=0.0, seed=None):
+        self.spreadsheets = {}
+        self.error_rate = error_rate
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.stats = {'calls': 0, 'errors_injected': 0, 'batch_updates': 0, 'bytes_received': 0}
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self.handler_class())
+        self.thread = None
+
+    @property
+    def api_base(self):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}/v4'
+
+    def spreadsheet(self, spreadsheet_id):
+        return self.spreadsheets.setdefault(spreadsheet_id, FakeSpreadsheet())
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, payload, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def route(self, method):
+                server.stats['calls'] += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                server.stats['bytes_received'] += len(body)
+                if server.error_rate and server.random.random() < server.error_rate:
+                    server.stats['errors_injected'] += 1
+                    status = server.random.choice((429, 503))
+                    return self.reply(status, {'error': {'code': status, 'message': 'injected'}},
+                                      {'Retry-After': '0'} if status == 429 else None)
+                if len(body) > MAX_PAYLOAD_BYTES:
+                    return self.reply(400, {'error': {'code': 400, 'message': 'payload too large'}})
+
+                match = PATH_RE.match(urlsplit(self.path).path)
+                if not match:
+                    return self.reply(404, {'error': {'code': 404, 'message': 'not found'}})
+                spreadsheet = server.spreadsheet(match.group('id'))
+                rest = match.group('rest')
+                try:
+                    with spreadsheet.lock:
+                        if method == 'GET' and rest == '':
+                            return self.reply(200, spreadsheet.metadata())
+                        if method == 'GET' and rest.startswith('/values/'):
+                            cell_range = unquote(rest[len('/values/'):])
+                            return self.reply(200, {'range': cell_range, 'values': spreadsheet.values(cell_range)})
+                        if method == 'POST' and rest == ':batchUpdate':
+                            server.stats['batch_updates'] += 1
+                            requests = json.loads(body)['requests']
+                            replies = [spreadsheet.apply(request) for request in requests]
+                            return self.reply(200, {'spreadsheetId': match.group('id'), 'replies': replies})
+                except (KeyError, ValueError) as e:
+                    return self.reply(400, {'error': {'code': 400, 'message': str(e)}})
+                return self.reply(404, {'error': {'code': 404, 'message': 'not found'}})
+
+            def do_GET(self):
+                self.route('GET')
+
+            def do_POST(self):
+                self.route('POST')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeSheetsServer(args.port, args.error_rate, args.latency)
+    print(f"Fake Sheets API on {server.api_base}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Record a dealer site's listing and vehicle pages as benchmark fixtures.
+
+    python benchmarks/record_fixtures.py reddeertoyota [--out DIR] [--limit 50]
+
+Crawls the site's inventory listings (all pages) and the first --limit
+vehicle pages, saving the raw response bodies (not the prettified debug
+dumps) and a manifest.json that benchmarks/fake_dealer.py serves them from.
+Needs network access once; the benchmarks then run offline.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.sites import get_site, load_sites
+from scraper.vehicle_scraper import VehicleScraper
+
+# Profile settings that stay meaningful when the site is served locally
+PROFILE_KEYS = ('inventory_paths', 'vehicle_path', 'exclude_suffixes', 'exclude_substrings',
+                'brands', 'condition_markers')
+
+
+def record(site, out, limit, workers):
+    scraper = VehicleScraper(site, max_workers=workers, quiet=True)
+    recorded = {}
+    fetch = scraper.fetch_content
+
+    def recording_fetch(url):
+        content = fetch(url)
+        if content is not None:
+            recorded[url] = content
+        return content
+
+    scraper.fetch_content = recording_fetch
+    links, complete = scraper.collect_links(site.inventory_urls)
+    if not complete:
+        logging.warning("Some listing pages failed; the fixtures are a partial inventory")
+    scraper.map_concurrent(recording_fetch, sorted(links)[:limit])
+
+    os.makedirs(os.path.join(out, 'pages'), exist_ok=True)
+    pages = {}
+    for url, content in sorted(recorded.items()):
+        parts = urlsplit(url)
+        key = parts.path + (f'?{parts.query}' if parts.query else '')
+        filename = f'pages/{hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]}.html'
+        with open(os.path.join(out, filename), 'wb') as f:
+            f.write(content)
+        pages[key] = filename
+    profile = site.to_dict()
+    manifest = {
+        'site': site.name,
+        'origin': site.base_url,
+        'profile': {key: profile[key] for key in PROFILE_KEYS},
+        'pages': pages,
+    }
+    with open(os.path.join(out, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return len(pages), sum(len(content) for content in recorded.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('site', help='registered site profile name')
+    parser.add_argument('--sites-file', help='JSON file of extra site profiles')
+    parser.add_argument('--out', help='fixture directory (default benchmarks/fixtures/SITE)')
+    parser.add_argument('--limit', type=int, default=50, help='vehicle pages to record')
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if args.sites_file:
+        load_sites(args.sites_file)
+    site = get_site(args.site)
+    out = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', site.name)
+    count, size = record(site, out, args.limit, args.workers)
+    print(f"Recorded {count} pages ({size / 1024:.0f} KiB) to {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,30 @@
-"""Vehicle scraper package"""
-from .vehicle_scraper import VehicleScraper
-from .sheets_uploader import GoogleSheetsUploader
+"""
+Vehicle scraper package.
 
-__all__ = ['VehicleScraper', 'GoogleSheetsUploader']
+Submodules load on first use: VehicleScraper pulls in requests and
+BeautifulSoup, GoogleSheetsUploader google-auth, which a serverless cold
+start shouldn't pay for before a stage needs them. Check with
+`python benchmarks/bench_imports.py`.
+"""
+import importlib
+
+_LAZY = {
+    'VehicleScraper': 'vehicle_scraper',
+    'GoogleSheetsUploader': 'sheets_uploader',
+    'run_scrape': 'runner',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
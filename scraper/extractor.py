@@ -0,0 +1,159 @@
+"""Single-pass field extraction for vehicle detail pages"""
+import re
+
+from bs4.element import CData, NavigableString, Tag
+
+# Visible text only: Script, Stylesheet, Comment etc. are NavigableString
+# subclasses and are skipped, matching what soup.get_text() returns.
+TEXT_TYPES = {NavigableString, CData}
+# Elements whose strings bs4 files under those subclasses
+HIDDEN_TEXT_TAGS = {'script', 'style', 'template', 'rt', 'rp'}
+
+# One scan over the page text finds all three fields. Each alternative is a
+# zero-width lookahead so a match never consumes text another field needs.
+FIELDS_RE = re.compile(
+    r'(?=(?i:(?:Stock|Stk)\s*#?\s*:?\s*(?P<stock>[A-Z0-9-]+))'
+    r'|\b(?P<vin>[A-HJ-NPR-Z0-9]{17})\b'
+    r'|(?i:(?P<km>[\d,]+)\s*km))'
+)
+PRICE_NUMBER_RE = re.compile(r'\$?\s*([\d,]+)')
+
+
+class PageScan:
+    """Everything extract_vehicle needs, collected in one walk of the tree"""
+
+    __slots__ = ('text', 'title', 'price_texts', 'stock', 'vin', 'mileage')
+
+    def __init__(self):
+        self.text = ''
+        self.title = ''
+        self.price_texts = []
+        self.stock = ''
+        self.vin = ''
+        self.mileage = ''
+
+
+def squash(text):
+    return ' '.join(text.split())
+
+
+def walk_soup(soup, heading_tags):
+    """
+    Page text plus (start, end) text spans of the first heading and of every
+    element holding a `$` string, from one pass over a BeautifulSoup tree
+    (the whole document or a single element).
+    """
+    parts = []
+    length = 0
+    starts = {}
+    price_parents = []
+    heading = None
+
+    # Follow bs4's document-order next_element chain (no recursion, no
+    # stack) and note where each node starts in the page text. An element's
+    # text is then a slice of the page text instead of another get_text().
+    # The root gets a start too: a `$` string directly under it makes it a
+    # price parent (a listing card holding its price as bare text)
+    starts[id(soup)] = 0
+    if soup.name in heading_tags:
+        heading = soup
+    node = soup.contents[0] if soup.contents else None
+    stop = soup._last_descendant().next_element
+    while node is not stop:
+        cls = node.__class__
+        starts[id(node)] = length
+        if cls is Tag:
+            if heading is None and node.name in heading_tags:
+                heading = node
+        elif cls in TEXT_TYPES:
+            parts.append(node)
+            length += len(node)
+            if '$' in node:
+                price_parents.append(node.parent)
+        node = node.next_element
+
+    def span(tag):
+        after = tag._last_descendant().next_element
+        return starts[id(tag)], starts.get(id(after), length)
+
+    return ''.join(parts), span(heading) if heading is not None else None, [span(p) for p in price_parents]
+
+
+def walk_lexbor(doc, heading_tags):
+    """walk_soup for a selectolax/lexbor document or node"""
+    parts = []
+    length = 0
+    starts = {}
+    price_parents = []
+    heading = None
+
+    root = doc.root if hasattr(doc, 'root') else doc
+    if root is None:
+        return '', None, []
+    for node in root.traverse(include_text=True):
+        tag = node.tag
+        starts[node.mem_id] = length
+        if tag == '-text':
+            parent = node.parent
+            if parent is not None and parent.tag in HIDDEN_TEXT_TAGS:
+                continue
+            text = node.text(deep=False)
+            parts.append(text)
+            length += len(text)
+            if '$' in text:
+                price_parents.append(parent)
+        elif heading is None and tag in heading_tags:
+            heading = node
+
+    def span(node):
+        # The node after the subtree is the next sibling of the nearest
+        # ancestor-or-self that has one
+        after = node
+        while after is not None and after.next is None:
+            after = after.parent
+        end = starts.get(after.next.mem_id, length) if after is not None else length
+        return starts[node.mem_id], end
+
+    return ''.join(parts), span(heading) if heading is not None else None, [span(p) for p in price_parents]
+
+
+def scan_page(doc, heading_tags=('h1',)):
+    """
+    Walk the document once, collecting the page text, the first heading, and
+    the text of every element holding a `$` string, then run the combined
+    field regex over the text. Works on BeautifulSoup and selectolax
+    documents, and on single elements such as listing cards.
+    """
+    scan = PageScan()
+    walk = walk_soup if isinstance(doc, Tag) else walk_lexbor
+    scan.text, heading_span, price_spans = walk(doc, heading_tags)
+
+    if heading_span is not None:
+        scan.title = squash(scan.text[heading_span[0]:heading_span[1]])
+
+    for start, end in price_spans:
+        text = squash(scan.text[start:end])
+        if text and len(text) < 200:
+            scan.price_texts.append(text)
+
+    for match in FIELDS_RE.finditer(scan.text):
+        if match.group('stock') and not scan.stock:
+            scan.stock = match.group('stock')
+        elif match.group('vin') and not scan.vin:
+            scan.vin = match.group('vin').upper()
+        elif match.group('km') and not scan.mileage:
+            scan.mileage = match.group('km').replace(',', '')
+        if scan.stock and scan.vin and scan.mileage:
+            break
+
+    return scan
+
+
+def select_price(price_texts):
+    """First 5+ digit amount in a `$` text that isn't an MSRP, with its source"""
+    for pt in price_texts:
+        if 'msrp' not in pt.lower() and '$' in pt:
+            for num in PRICE_NUMBER_RE.findall(pt.replace(',', '')):
+                if len(num) >= 5:
+                    return num, pt
+    return '', ''
@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class FingerprintStore:
+    """
+    Persisted per-URL content hashes with the last extracted record.
+
+    A vehicle page whose body hash (and extractor version) matches the
+    stored one is not parsed again; the previous `data` dict is reused.
+    """
+
+    def __init__(self, path='.cache/fingerprints.json', version=1):
+        self.path = path
+        self.version = version
+        self.lock = threading.Lock()
+        self.records = {}
+        self.reused = 0
+        self.parsed = 0
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.records = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable fingerprint store {path}: {e}")
+
+    def lookup(self, url, digest):
+        """Copy of the stored record if the page content is unchanged"""
+        with self.lock:
+            record = self.records.get(url)
+            if not record or record.get('hash') != digest or record.get('version') != self.version:
+                return None
+            record['last_seen'] = record['fetched_at'] = time.time()
+            self.reused += 1
+            return dict(record['data'])
+
+    def update(self, url, digest, data):
+        with self.lock:
+            self.records[url] = {
+                'hash': digest,
+                'version': self.version,
+                'data': dict(data),
+                'last_seen': time.time(),
+                'fetched_at': time.time(),
+            }
+            self.parsed += 1
+
+    def previous(self, url):
+        """Last extracted record for `url` and its detail-page age in seconds"""
+        with self.lock:
+            record = self.records.get(url)
+            if not record or record.get('version') != self.version:
+                return None, None
+            record['last_seen'] = time.time()
+            return dict(record['data']), time.time() - record.get('fetched_at', 0)
+
+    def remove_missing(self, current_urls):
+        """Forget URLs no longer in the inventory listing and return them"""
+        current_urls = set(current_urls)
+        with self.lock:
+            removed = sorted(url for url in self.records if url not in current_urls)
+            for url in removed:
+                del self.records[url]
+        return removed
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with self.lock:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.records, f)
+        os.replace(tmp, self.path)
+
+    def summary(self):
+        return f"Fingerprints: {self.reused} unchanged (reused), {self.parsed} parsed"
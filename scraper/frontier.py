@@ -0,0 +1,234 @@
+"""
+Durable crawl frontier: the state of every vehicle URL of a run, so a run
+that is killed (or a serverless invocation that runs out of time) picks up
+where it stopped instead of starting over.
+
+URL states:
+    discovered  found on a listing page, not scraped yet
+    parsed      record extracted and saved here, not yet accepted by the sinks
+    uploaded    written to every sink of a pipeline that closed cleanly
+    failed      fetch failed; retried by later slices up to MAX_ATTEMPTS,
+                unless the page is gone (404/410): that's final at once
+
+A run is identified by a run ID shared by all dealers crawled together.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = '.cache/frontier.db'
+
+DISCOVERED = 'discovered'
+PARSED = 'parsed'
+UPLOADED = 'uploaded'
+FAILED = 'failed'
+STATES = (DISCOVERED, PARSED, UPLOADED, FAILED)
+
+MAX_ATTEMPTS = 3
+
+# Failure reasons (FetchResult.describe() prefixes) of pages that are gone
+# for good: a delisted vehicle, not a page we failed to read
+GONE_ERRORS = ('http_404', 'http_410')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT NOT NULL,
+    dealer TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    listed_at REAL,
+    listings_complete INTEGER,
+    finished_at REAL,
+    PRIMARY KEY (run_id, dealer)
+);
+CREATE TABLE IF NOT EXISTS urls (
+    run_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    dealer TEXT NOT NULL,
+    state TEXT NOT NULL,
+    record TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, url)
+);
+CREATE INDEX IF NOT EXISTS urls_state ON urls (run_id, dealer, state);
+'''
+
+
+def new_run_id():
+    return time.strftime('%Y%m%d-%H%M%S', time.gmtime()) + '-' + uuid.uuid4().hex[:6]
+
+
+class Frontier:
+    """SQLite-backed frontier; safe to share between threads and processes"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    # -- runs -----------------------------------------------------------
+
+    def start_run(self, dealers, run_id=None, max_age_hours=24):
+        """
+        The run to work on: `run_id` if given, else the newest unfinished run
+        of these dealers started within `max_age_hours`, else a new one.
+        Returns (run_id, resumed).
+        """
+        if run_id is None:
+            since = time.time() - max_age_hours * 3600
+            marks = ', '.join('?' * len(dealers))
+            rows = self.execute(f'''
+                SELECT run_id FROM runs
+                WHERE dealer IN ({marks}) AND finished_at IS NULL AND started_at >= ?
+                ORDER BY started_at DESC LIMIT 1''', (*dealers, since))
+            run_id = rows[0][0] if rows else None
+        resumed = run_id is not None and bool(self.execute(
+            'SELECT 1 FROM runs WHERE run_id = ? LIMIT 1', (run_id,)))
+        run_id = run_id or new_run_id()
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                'INSERT OR IGNORE INTO runs (run_id, dealer, started_at) VALUES (?, ?, ?)',
+                [(run_id, dealer, now) for dealer in dealers])
+        return run_id, resumed
+
+    def started_at(self, run_id):
+        rows = self.execute('SELECT MIN(started_at) FROM runs WHERE run_id = ?', (run_id,))
+        return rows[0][0] if rows else None
+
+    def finish_run(self, run_id):
+        with self.lock:
+            self.db.execute('UPDATE runs SET finished_at = ? WHERE run_id = ? AND finished_at IS NULL',
+                            (time.time(), run_id))
+
+    # -- listing stage ----------------------------------------------------
+
+    def links(self, run_id, dealer):
+        """(urls, listings_complete) if this dealer's listings were already crawled, else None"""
+        rows = self.execute('SELECT listed_at, listings_complete FROM runs WHERE run_id = ? AND dealer = ?',
+                            (run_id, dealer))
+        if not rows or rows[0][0] is None:
+            return None
+        urls = [url for url, in self.execute('SELECT url FROM urls WHERE run_id = ? AND dealer = ?',
+                                             (run_id, dealer))]
+        return urls, bool(rows[0][1])
+
+    def add_links(self, run_id, dealer, urls, listings_complete, cards=None):
+        """Record the listing stage; `cards` are listing-only records kept for resumes"""
+        now = time.time()
+        cards = cards or {}
+        with self.lock:
+            self.db.execute('BEGIN')
+            self.db.executemany(
+                'INSERT OR IGNORE INTO urls (run_id, url, dealer, state, record, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(run_id, url, dealer, DISCOVERED,
+                  json.dumps(cards[url]) if url in cards else None, now) for url in urls])
+            self.db.execute('UPDATE runs SET listed_at = ?, listings_complete = ? WHERE run_id = ? AND dealer = ?',
+                            (now, int(listings_complete), run_id, dealer))
+            self.db.execute('COMMIT')
+
+    def cards(self, run_id, dealer):
+        """Listing-card records saved with still-discovered URLs"""
+        return {url: json.loads(record) for url, record in self.execute(
+            'SELECT url, record FROM urls WHERE run_id = ? AND dealer = ? AND state = ? AND record IS NOT NULL',
+            (run_id, dealer, DISCOVERED))}
+
+    # -- scraping stage -------------------------------------------------
+
+    def pending(self, run_id, dealer):
+        """URLs still to scrape, in URL order"""
+        return [url for url, in self.execute(
+            'SELECT url FROM urls WHERE run_id = ? AND dealer = ? '
+            'AND (state = ? OR (state = ? AND attempts < ?)) ORDER BY url',
+            (run_id, dealer, DISCOVERED, FAILED, MAX_ATTEMPTS))]
+
+    def failed_count(self, run_id, dealer):
+        """
+        URLs out of attempts for a reason other than the page being gone.
+        Their vehicles may still be listed, so the run can't count as a
+        complete view of the inventory.
+        """
+        gone = ' AND '.join('error NOT LIKE ?' for _ in GONE_ERRORS)
+        rows = self.execute(
+            'SELECT COUNT(*) FROM urls WHERE run_id = ? AND dealer = ? AND state = ? AND attempts >= ? '
+            f"AND (error IS NULL OR ({gone}))",
+            (run_id, dealer, FAILED, MAX_ATTEMPTS, *(f'{prefix}%' for prefix in GONE_ERRORS)))
+        return rows[0][0]
+
+    def remaining(self, run_id):
+        """Dealers not listed yet plus URLs still to scrape or upload, over the whole run"""
+        unlisted = self.execute('SELECT COUNT(*) FROM runs WHERE run_id = ? AND listed_at IS NULL', (run_id,))
+        urls = self.execute(
+            'SELECT COUNT(*) FROM urls WHERE run_id = ? '
+            'AND (state IN (?, ?) OR (state = ? AND attempts < ?))',
+            (run_id, DISCOVERED, PARSED, FAILED, MAX_ATTEMPTS))
+        return unlisted[0][0] + urls[0][0]
+
+    def mark_parsed(self, run_id, url, data):
+        with self.lock:
+            self.db.execute(
+                'UPDATE urls SET state = ?, record = ?, error = NULL, updated_at = ? WHERE run_id = ? AND url = ?',
+                (PARSED, json.dumps(data), time.time(), run_id, url))
+
+    def mark_failed(self, run_id, url, error='fetch failed', gone=False):
+        """A failed fetch; a gone page (a sold vehicle) is out of attempts right away"""
+        with self.lock:
+            self.db.execute(
+                'UPDATE urls SET state = ?, attempts = MAX(attempts + 1, ?), error = ?, updated_at = ? '
+                'WHERE run_id = ? AND url = ?',
+                (FAILED, MAX_ATTEMPTS if gone else 0, error, time.time(), run_id, url))
+
+    def records(self, run_id, dealer=None, states=(PARSED,)):
+        """Saved records (data dicts) in the given states, in URL order"""
+        marks = ', '.join('?' * len(states))
+        sql = f'SELECT record FROM urls WHERE run_id = ? AND state IN ({marks}) AND record IS NOT NULL'
+        params = [run_id, *states]
+        if dealer:
+            sql += ' AND dealer = ?'
+            params.append(dealer)
+        return [json.loads(record) for record, in self.execute(sql + ' ORDER BY url', params)]
+
+    # -- upload stage -----------------------------------------------------
+
+    def mark_uploaded(self, run_id, urls):
+        """These parsed URLs reached every sink"""
+        now = time.time()
+        with self.lock:
+            self.db.execute('BEGIN')
+            self.db.executemany('UPDATE urls SET state = ?, updated_at = ? WHERE run_id = ? AND url = ? AND state = ?',
+                                [(UPLOADED, now, run_id, url, PARSED) for url in urls])
+            self.db.execute('COMMIT')
+
+    def progress(self, run_id):
+        """{'discovered': n, 'parsed': n, 'uploaded': n, 'failed': n, 'total': n}"""
+        counts = dict.fromkeys(STATES, 0)
+        for state, count in self.execute('SELECT state, COUNT(*) FROM urls WHERE run_id = ? GROUP BY state',
+                                          (run_id,)):
+            counts[state] = count
+        counts['total'] = sum(counts[state] for state in STATES)
+        return counts
+
+    def summary(self, run_id):
+        counts = self.progress(run_id)
+        return (f"Frontier {run_id}: {counts['uploaded']} uploaded, {counts['parsed']} parsed, "
+                f"{counts['discovered']} to do, {counts['failed']} failed of {counts['total']}")
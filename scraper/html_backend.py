@@ -0,0 +1,117 @@
+"""
+HTML parser backends.
+
+'html.parser' and 'lxml' build a BeautifulSoup tree; 'selectolax' builds a
+lexbor tree, which is several times faster to parse. Code outside this
+module and extractor.py should only touch documents through these helpers
+so every backend yields the same links and fields.
+"""
+import logging
+
+from bs4 import BeautifulSoup, FeatureNotFound
+from bs4.element import Tag
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('html.parser', 'lxml', 'selectolax')
+DEFAULT_BACKEND = 'html.parser'
+
+
+def available_backends():
+    """Backends whose optional dependency is installed"""
+    available = ['html.parser']
+    try:
+        BeautifulSoup('', 'lxml')
+        available.append('lxml')
+    except FeatureNotFound:
+        pass
+    if LexborHTMLParser is not None:
+        available.append('selectolax')
+    return available
+
+
+def resolve_backend(name):
+    """Validate a backend name, falling back to html.parser if it isn't installed"""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend {name!r}; choose from {', '.join(BACKENDS)}")
+    if name not in available_backends():
+        logger.warning(f"HTML parser backend {name!r} is not installed, using {DEFAULT_BACKEND}")
+        return DEFAULT_BACKEND
+    return name
+
+
+def parse_html(content, backend=DEFAULT_BACKEND):
+    if backend == 'selectolax':
+        return LexborHTMLParser(content)
+    return BeautifulSoup(content, backend)
+
+
+def is_soup(doc):
+    return isinstance(doc, BeautifulSoup)
+
+
+def iter_hrefs(doc):
+    """href of every <a href> in document order"""
+    for _, href in iter_anchors(doc):
+        yield href
+
+
+def to_html(doc):
+    """Serialized document, for the debug_output dumps"""
+    return doc.prettify() if is_soup(doc) else doc.html
+
+
+def iter_script_texts(doc, script_type):
+    """Contents of every <script type=script_type>"""
+    if is_soup(doc):
+        for script in doc.find_all('script', type=script_type):
+            yield script.string or script.get_text()
+    else:
+        for script in doc.css(f'script[type="{script_type}"]'):
+            yield script.text(deep=True)
+
+
+def iter_anchors(doc):
+    """(element, href) for every <a href> in document order"""
+    if is_soup(doc):
+        for a in doc.find_all('a', href=True):
+            yield a, a['href']
+    else:
+        for a in doc.css('a[href]'):
+            yield a, a.attributes.get('href') or ''
+
+
+def node_key(node):
+    """Stable identity for an element (selectolax hands out fresh wrappers)"""
+    return id(node) if is_soup_node(node) else node.mem_id
+
+
+def node_name(node):
+    return node.name if is_soup_node(node) else node.tag
+
+
+def node_text(node):
+    if is_soup_node(node):
+        return ' '.join(node.get_text(' ').split())
+    return ' '.join(node.text(separator=' ').split())
+
+
+def node_attr(node, name):
+    if is_soup_node(node):
+        value = node.get(name)
+        return ' '.join(value) if isinstance(value, list) else value
+    return node.attributes.get(name)
+
+
+def select_all(node, css):
+    return node.select(css) if is_soup_node(node) else node.css(css)
+
+
+def is_soup_node(node):
+    return isinstance(node, Tag)
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPCache:
+    """
+    On-disk response cache keyed by URL.
+
+    Each entry is a `<sha256>.json` file holding the validators (ETag /
+    Last-Modified) next to a `<sha256>.body` file with the raw response.
+    Entries are revalidated with a conditional GET; a 304 reuses the body.
+
+    stats: `hits` counts bodies reused after a 304, `changed` entries the
+    server answered with a new 200, `misses` URLs with no usable entry.
+    """
+
+    def __init__(self, cache_dir='.cache/http', max_age_days=7, max_bytes=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_age = max_age_days * 86400
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'changed': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, url, suffix):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{key}.{suffix}')
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def lookup(self, url):
+        """
+        Return the stored entry for `url`, or None if missing or expired.
+        A found entry is not a hit until the server confirms it (load_body).
+        """
+        try:
+            with open(self.path_for(url, 'json'), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.count('misses')
+            return None
+        if time.time() - entry.get('stored_at', 0) > self.max_age:
+            self.remove(url)
+            self.count('misses')
+            return None
+        return entry
+
+    def conditional_headers(self, entry):
+        """Validator headers to send for a cached entry"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def load_body(self, url):
+        """Body of a revalidated entry (server answered 304), or None if lost"""
+        try:
+            with open(self.path_for(url, 'body'), 'rb') as f:
+                content = f.read()
+        except OSError:
+            self.count('misses')
+            return None
+        self.count('hits')
+        self.touch(url)
+        return content
+
+    def store(self, url, response, entry=None):
+        """
+        Save a 200 response if the server sent any validators. `entry` is
+        the one lookup() returned, if any: the page changed since then.
+        """
+        if entry:
+            self.count('changed')
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': time.time(),
+            'size': len(response.content),
+        }
+        try:
+            self.write_atomic(self.path_for(url, 'body'), response.content)
+            self.write_atomic(self.path_for(url, 'json'), json.dumps(entry).encode('utf-8'))
+            self.count('stored')
+        except OSError as e:
+            logger.warning(f"Could not cache {url}: {e}")
+
+    def touch(self, url):
+        """Restart the age clock of an entry the server just confirmed"""
+        path = self.path_for(url, 'json')
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            entry['stored_at'] = time.time()
+            self.write_atomic(path, json.dumps(entry).encode('utf-8'))
+        except (OSError, ValueError):
+            pass
+
+    def write_atomic(self, path, data):
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def remove(self, url):
+        for suffix in ('json', 'body'):
+            try:
+                os.remove(self.path_for(url, suffix))
+            except OSError:
+                pass
+
+    def prune(self):
+        """Drop expired entries, then the oldest ones until under max_bytes"""
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, name), encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if now - entry.get('stored_at', 0) > self.max_age:
+                self.remove(entry['url'])
+                self.count('evicted')
+            else:
+                entries.append(entry)
+
+        total = sum(e.get('size', 0) for e in entries)
+        for entry in sorted(entries, key=lambda e: e.get('stored_at', 0)):
+            if total <= self.max_bytes:
+                break
+            self.remove(entry['url'])
+            total -= entry.get('size', 0)
+            self.count('evicted')
+
+    def summary(self):
+        s = self.stats
+        return (f"HTTP cache: {s['hits']} hits (304), {s['changed']} changed, "
+                f"{s['misses']} misses, {s['evicted']} evicted")
@@ -0,0 +1,269 @@
+"""
+Persistent SQLite inventory: every vehicle ever seen, with first/last-seen
+timestamps, a sold date and a price history, so questions like "what
+dropped in price this week" don't need the sheet.
+
+    python -m scraper.inventory_store [--db .cache/inventory.db] price-drops --days 7
+    python -m scraper.inventory_store days-on-lot --by model
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+from .vehicle import FIELDS, INT_FIELDS, Vehicle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = '.cache/inventory.db'
+
+# Vehicle fields become columns; `key` is dealer + VIN / stock / link
+COLUMN_DEFS = ', '.join(f'{field} {"INTEGER" if field in INT_FIELDS else "TEXT"}' for field in FIELDS)
+
+SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS vehicles (
+    key TEXT PRIMARY KEY,
+    {COLUMN_DEFS},
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    sold_at TEXT
+);
+CREATE INDEX IF NOT EXISTS vehicles_vin ON vehicles (vin);
+CREATE INDEX IF NOT EXISTS vehicles_stock ON vehicles (dealer, stock);
+CREATE INDEX IF NOT EXISTS vehicles_last_seen ON vehicles (dealer, last_seen);
+
+CREATE TABLE IF NOT EXISTS price_history (
+    key TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    seen_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS price_history_key ON price_history (key, seen_at);
+CREATE INDEX IF NOT EXISTS price_history_seen ON price_history (seen_at);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    vehicles INTEGER,
+    complete INTEGER
+);
+'''
+
+UPDATE_COLUMNS = ', '.join(f'{field} = excluded.{field}' for field in FIELDS)
+
+
+def timestamp(when=None):
+    """UTC 'YYYY-MM-DD HH:MM:SS', the format SQLite's date functions read"""
+    when = datetime.fromtimestamp(when, timezone.utc) if when is not None else datetime.now(timezone.utc)
+    return when.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def store_key(vehicle):
+    key = vehicle.key()
+    return f'{vehicle.dealer}|{key}' if key else None
+
+
+class InventoryStore:
+    """
+    A run is staged batch by batch (begin_run, stage) and merged into the
+    inventory in one transaction (finish_run): upsert by key, a
+    price_history row for every new or changed price, and, when the crawl
+    was complete, a sold date for that dealer's vehicles the run didn't see.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit; runs manage their own transaction. One thread at a
+        # time, but not necessarily the one that opened it (ThreadedSink)
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=60)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+        self.run_id = None
+        self.run_started = None
+        self.staged = 0
+
+    def close(self):
+        self.db.close()
+
+    # -- writing --------------------------------------------------------
+
+    def begin_run(self, now=None):
+        """
+        Start staging a run. Staging only writes the connection's temp
+        database, so other writers aren't locked out until the merge.
+        """
+        self.run_started = timestamp(now)
+        self.staged = 0
+        self.db.execute(f'CREATE TEMP TABLE IF NOT EXISTS staging (key TEXT PRIMARY KEY, {COLUMN_DEFS})')
+        self.db.execute('DELETE FROM staging')
+
+    def stage(self, vehicles):
+        """Queue a batch of Vehicles for this run (a later duplicate key wins)"""
+        rows = []
+        for vehicle in vehicles:
+            key = store_key(vehicle)
+            if key:
+                rows.append((key,) + vehicle.values)
+        marks = ', '.join('?' * (len(FIELDS) + 1))
+        self.db.executemany(f'INSERT OR REPLACE INTO staging VALUES ({marks})', rows)
+        self.staged += len(rows)
+
+    def finish_run(self, complete=True):
+        """Merge the staged run into the inventory and commit"""
+        now = self.run_started
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            self.db.execute('''
+                INSERT INTO price_history (key, price, seen_at)
+                SELECT s.key, s.price, ? FROM staging s LEFT JOIN vehicles v ON v.key = s.key
+                WHERE s.price IS NOT NULL AND (v.key IS NULL OR v.price IS NOT s.price)
+            ''', (now,))
+            self.db.execute(f'''
+                INSERT INTO vehicles (key, {', '.join(FIELDS)}, first_seen, last_seen, sold_at)
+                SELECT key, {', '.join(FIELDS)}, ?, ?, NULL FROM staging WHERE true
+                ON CONFLICT (key) DO UPDATE SET {UPDATE_COLUMNS},
+                    last_seen = excluded.last_seen, sold_at = NULL
+            ''', (now, now))
+            sold = 0
+            if complete:
+                # Only dealers this run actually crawled (in any of its
+                # slices); a partial crawl would make unseen vehicles look sold
+                sold = self.db.execute('''
+                    UPDATE vehicles SET sold_at = ?
+                    WHERE sold_at IS NULL AND last_seen < ?
+                      AND dealer IN (SELECT DISTINCT dealer FROM vehicles WHERE last_seen = ?)
+                ''', (now, now, now)).rowcount
+            self.run_id = self.db.execute(
+                'INSERT INTO runs (started_at, finished_at, vehicles, complete) VALUES (?, ?, ?, ?)',
+                (now, timestamp(), self.staged, int(complete))).lastrowid
+            self.db.execute('DELETE FROM staging')
+            self.db.execute('COMMIT')
+        except Exception:
+            self.db.execute('ROLLBACK')
+            raise
+        return sold
+
+    def abort_run(self):
+        if self.db.in_transaction:
+            self.db.execute('ROLLBACK')
+        self.db.execute('DELETE FROM staging')
+
+    def record_run(self, vehicles, complete=True):
+        """Stage and merge a whole run at once; returns how many were marked sold"""
+        self.begin_run()
+        self.stage(vehicles)
+        return self.finish_run(complete)
+
+    # -- queries ----------------------------------------------------------
+
+    def current(self, dealer=None):
+        """Unsold vehicles as Vehicles, e.g. to feed the Sheets upload"""
+        sql = f'SELECT {", ".join(FIELDS)} FROM vehicles WHERE sold_at IS NULL'
+        params = ()
+        if dealer:
+            sql += ' AND dealer = ?'
+            params = (dealer,)
+        return [Vehicle(**dict(row)) for row in self.db.execute(sql + ' ORDER BY dealer, link', params)]
+
+    def find(self, vin=None, stock=None, dealer=None):
+        if vin:
+            rows = self.db.execute('SELECT * FROM vehicles WHERE vin = ?', (vin.upper(),))
+        else:
+            rows = self.db.execute('SELECT * FROM vehicles WHERE dealer = ? AND stock = ?', (dealer, stock))
+        return [dict(row) for row in rows]
+
+    def price_history(self, key):
+        return [dict(row) for row in self.db.execute(
+            'SELECT price, seen_at FROM price_history WHERE key = ? ORDER BY seen_at', (key,))]
+
+    def price_drops(self, days=7):
+        """Price cuts recorded in the last `days` days, biggest first"""
+        since = since_timestamp(days)
+        return [dict(row) for row in self.db.execute('''
+            WITH changes AS (
+                SELECT key, price, seen_at,
+                       LAG(price) OVER (PARTITION BY key ORDER BY seen_at) AS old_price
+                FROM price_history
+                WHERE key IN (SELECT key FROM price_history WHERE seen_at >= ?)
+            )
+            SELECT v.dealer, v.title, v.vin, v.stock, c.old_price, c.price AS new_price,
+                   c.old_price - c.price AS drop_amount, c.seen_at AS changed_at, v.link
+            FROM changes c JOIN vehicles v ON v.key = c.key
+            WHERE c.seen_at >= ? AND c.old_price > c.price
+            ORDER BY drop_amount DESC
+        ''', (since, since))]
+
+    def days_on_lot(self, by='model', dealer=None):
+        """Average / max days between first seen and sold (or now), grouped by a field"""
+        if by not in FIELDS:
+            raise ValueError(f"Unknown field {by!r}")
+        sql = f'''
+            SELECT {by}, COUNT(*) AS vehicles, SUM(sold_at IS NOT NULL) AS sold,
+                   ROUND(AVG(julianday(COALESCE(sold_at, ?)) - julianday(first_seen)), 1) AS avg_days,
+                   ROUND(MAX(julianday(COALESCE(sold_at, ?)) - julianday(first_seen)), 1) AS max_days
+            FROM vehicles {'WHERE dealer = ?' if dealer else ''}
+            GROUP BY {by} ORDER BY avg_days DESC
+        '''
+        now = timestamp()
+        params = (now, now, dealer) if dealer else (now, now)
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def new_since(self, days=7):
+        return [dict(row) for row in self.db.execute(
+            'SELECT dealer, title, vin, stock, price, first_seen, link FROM vehicles '
+            'WHERE first_seen >= ? ORDER BY first_seen DESC', (since_timestamp(days),))]
+
+    def sold_since(self, days=7):
+        return [dict(row) for row in self.db.execute(
+            'SELECT dealer, title, vin, stock, price, first_seen, sold_at, link FROM vehicles '
+            'WHERE sold_at >= ? ORDER BY sold_at DESC', (since_timestamp(days),))]
+
+    def summary(self):
+        total, unsold = self.db.execute(
+            'SELECT COUNT(*), SUM(sold_at IS NULL) FROM vehicles').fetchone()
+        return f"Inventory store: {unsold or 0} on the lot, {total - (unsold or 0)} sold, {self.path}"
+
+
+def since_timestamp(days):
+    return timestamp(time.time() - timedelta(days=days).total_seconds())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=DEFAULT_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name in ('price-drops', 'new', 'sold'):
+        commands.add_parser(name).add_argument('--days', type=float, default=7)
+    lot = commands.add_parser('days-on-lot')
+    lot.add_argument('--by', default='model')
+    lot.add_argument('--dealer')
+    args = parser.parse_args()
+
+    store = InventoryStore(args.db)
+    started = time.perf_counter()
+    if args.command == 'price-drops':
+        rows = store.price_drops(args.days)
+    elif args.command == 'new':
+        rows = store.new_since(args.days)
+    elif args.command == 'sold':
+        rows = store.sold_since(args.days)
+    else:
+        rows = store.days_on_lot(args.by, args.dealer)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    if rows:
+        columns = list(rows[0])
+        print('\t'.join(columns))
+        for row in rows:
+            print('\t'.join('' if row[column] is None else str(row[column]) for column in columns))
+    print(f"{len(rows)} rows in {elapsed:.1f} ms")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+In-process job queue for scrape runs: submit returns a job ID at once,
+worker threads run the jobs, and callers poll the job or follow its
+progress events (the API serves them as JSON and server-sent events).
+
+State lives in this process only, which suits a local or long-running
+server; a serverless deployment needs a shared queue and store instead.
+"""
+import logging
+import queue
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobConflict(ValueError):
+    """Another active job crawls some of the same dealers"""
+
+
+class Job:
+    def __init__(self, sites, kwargs):
+        self.id = uuid.uuid4().hex[:12]
+        self.sites = list(sites)
+        self.kwargs = kwargs
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.version = 0
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self, results=False):
+        progress = dict(self.progress)
+        recent = progress.pop('recent', [])
+        data = {
+            'job_id': self.id,
+            'sites': self.sites,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': progress,
+            'error': self.error,
+        }
+        if self.result is not None:
+            data['result'] = {key: value for key, value in self.result.items() if key != 'reports'}
+        if results:
+            data['recent_vehicles'] = recent
+        return data
+
+
+class JobQueue:
+    """
+    runner: called as runner(sites, progress=callback, **kwargs) in a
+        worker thread; run_scrape in practice
+    workers: jobs run at once (different dealers crawl in parallel)
+    keep: finished jobs remembered for polling
+    """
+
+    def __init__(self, runner, workers=2, keep=100):
+        self.runner = runner
+        self.keep = keep
+        self.jobs = {}
+        self.order = []
+        self.queue = queue.Queue()
+        self.changed = threading.Condition()
+        self.threads = [threading.Thread(target=self.work, name=f'scrape-job-{n}', daemon=True)
+                        for n in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, sites, **kwargs):
+        """
+        Queue a run for `sites`. An active job for the same sites is
+        returned instead; one sharing only some raises JobConflict, as both
+        would resume the same frontier run.
+        """
+        with self.changed:
+            for job in self.jobs.values():
+                if not job.active or not set(job.sites) & set(sites):
+                    continue
+                if sorted(job.sites) == sorted(sites):
+                    return job
+                raise JobConflict(f"job {job.id} is already crawling {', '.join(sorted(set(job.sites) & set(sites)))}")
+            job = Job(sites, kwargs)
+            self.jobs[job.id] = job
+            self.order.append(job.id)
+            self.forget_old()
+        self.queue.put(job)
+        logger.info(f"Queued job {job.id} for {', '.join(job.sites)}")
+        return job
+
+    def get(self, job_id):
+        with self.changed:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self.changed:
+            return [self.jobs[job_id] for job_id in self.order]
+
+    def forget_old(self):
+        finished = [job_id for job_id in self.order if not self.jobs[job_id].active]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            self.order.remove(job_id)
+            del self.jobs[job_id]
+
+    def update(self, job, **fields):
+        with self.changed:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.version += 1
+            self.changed.notify_all()
+
+    def work(self):
+        while True:
+            job = self.queue.get()
+            self.update(job, status=RUNNING, started_at=time.time())
+            try:
+                result = self.runner(job.sites, progress=lambda snapshot: self.update(job, progress=snapshot),
+                                     **job.kwargs)
+            except Exception as e:
+                logger.error(f"❌ Job {job.id} failed: {e}")
+                self.update(job, status=FAILED, error=str(e), finished_at=time.time())
+                continue
+            error = result.get('error') if isinstance(result, dict) else None
+            self.update(job, status=FAILED if error else DONE, result=result, error=error,
+                        finished_at=time.time())
+
+    def events(self, job_id, heartbeat=15.0):
+        """
+        Yield (event, job dict) on every change of the job until it
+        finishes: 'progress' while running, then 'done' or 'failed'.
+        None is yielded every `heartbeat` seconds without a change.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+        seen = -1
+        while True:
+            with self.changed:
+                self.changed.wait_for(lambda: job.version != seen or not job.active, timeout=heartbeat)
+                version = job.version
+                snapshot = job.to_dict()
+                active = job.active
+            if not active:
+                yield job.status, snapshot
+                return
+            if version == seen:
+                yield None, None
+            else:
+                seen = version
+                yield 'progress', snapshot
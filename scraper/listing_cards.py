@@ -0,0 +1,56 @@
+"""Locate vehicle cards on inventory grid pages"""
+from .html_backend import iter_anchors, node_attr, node_key, node_name, node_text, select_all
+
+# Never treat these as a card, even on a page listing a single vehicle
+PAGE_CONTAINERS = {'body', 'html', '[document]', '-document', 'main'}
+IMAGE_ATTRS = ('data-src', 'data-lazy-src', 'src')
+
+
+def find_cards(doc, vehicle_url):
+    """
+    Map each vehicle URL on a listing page to (card element, link text).
+
+    A card is the largest ancestor of the vehicle's link that contains no
+    link to any other vehicle, so it works without site-specific selectors.
+    `vehicle_url(href)` returns the absolute vehicle URL or None.
+    """
+    urls_under = {}
+    elements = {}
+    chains = []
+    for anchor, href in iter_anchors(doc):
+        url = vehicle_url(href)
+        if not url:
+            continue
+        chain = []
+        node = anchor
+        while node is not None and node_name(node) not in PAGE_CONTAINERS:
+            key = node_key(node)
+            urls_under.setdefault(key, set()).add(url)
+            elements[key] = node
+            chain.append(key)
+            node = node.parent
+        chains.append((url, node_text(anchor), chain))
+
+    cards = {}
+    for url, link_text, chain in chains:
+        card, title = cards.get(url, (None, ''))
+        if card is None:
+            for key in chain:
+                if urls_under[key] != {url}:
+                    break
+                card = elements[key]
+        # Prefer the most descriptive link text ("View details" vs the name)
+        if len(link_text) > len(title):
+            title = link_text
+        cards[url] = (card, title)
+    return cards
+
+
+def card_image(card):
+    """First image URL in a card, looking past lazy-load placeholders"""
+    for img in select_all(card, 'img'):
+        for attr in IMAGE_ATTRS:
+            src = node_attr(img, attr)
+            if src and not src.startswith('data:'):
+                return src
+    return ''
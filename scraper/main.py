@@ -1,8 +1,8 @@
 import os
+import sys
 import logging
 from dotenv import load_dotenv
-from scraper.vehicle_scraper import VehicleScraper
-from scraper.sheets_uploader import GoogleSheetsUploader
+from scraper.runner import options_from_env, run_scrape, sites_from_env
 
 # Load environment variables
 load_dotenv()
@@ -20,53 +20,63 @@ def main():
     logger.info("VEHICLE INVENTORY SCRAPER")
     logger.info("="*120)
     
-    # URLs to scrape
-    urls = [
-        "https://www.reddeertoyota.com/inventory/new/",
-        "https://www.reddeertoyota.com/inventory/new/?page=2",
-        "https://www.reddeertoyota.com/inventory/new/?page=3",
-        "https://www.reddeertoyota.com/inventory/used/",
-        "https://www.reddeertoyota.com/inventory/used/?page=2",
-        "https://www.reddeertoyota.com/inventory/used/?page=3"
-    ]
+    sites = sites_from_env()
     
-    # Initialize scraper
-    scraper = VehicleScraper()
+    # Where records go as they're scraped: SCRAPER_OUTPUTS is a comma list of
+    # kind:path (tsv, csv, jsonl, sqlite), plus Google Sheets when configured.
+    # sqlite is the persistent inventory store (history, sold dates)
+    outputs = os.getenv('SCRAPER_OUTPUTS', 'tsv:vehicles.tsv,sqlite:.cache/inventory.db')
     
-    # Scrape vehicles
-    logger.info(f"\nScraping {len(urls)} pages...")
-    vehicles = scraper.scrape_inventory_pages(urls)
-    logger.info(f"\n{'='*120}")
-    logger.info(f"SCRAPING COMPLETE - Total vehicles: {len(vehicles)}")
-    logger.info(f"{'='*120}")
-    
-    if not vehicles:
-        logger.warning("\n⚠️  No vehicles scraped. Exiting.")
-        return
-    
-    # Get credentials from environment
     google_creds = os.getenv('GOOGLE_CREDENTIALS')
     sheet_id = os.getenv('GOOGLE_SHEET_ID')
-    
     if not google_creds or not sheet_id:
         logger.error("\n❌ Missing Google credentials or Sheet ID")
         logger.error("Please set GOOGLE_CREDENTIALS and GOOGLE_SHEET_ID environment variables")
-        return
+        logger.error("Records are still written to: " + (outputs or 'nowhere'))
     
-    # Upload to Google Sheets
-    logger.info("\n" + "="*120)
-    logger.info("UPLOADING TO GOOGLE SHEETS")
-    logger.info("="*120)
+    # Scrape vehicles, one worker process per dealer, streaming into the sinks.
+    # The frontier lets a killed run resume (SCRAPER_RUN_ID picks a run)
+    result = run_scrape(
+        sites,
+        options=options_from_env(),
+        outputs=outputs,
+        google_creds=google_creds,
+        sheet_id=sheet_id,
+        sheets_batch_size=int(os.getenv('SHEETS_BATCH_SIZE', '50')),
+        sheets_per_dealer=os.getenv('SHEETS_PER_DEALER', '0') == '1',
+        processes=int(os.getenv('SCRAPER_PROCESSES', '0')) or None,
+        frontier_path=os.getenv('SCRAPER_FRONTIER', '.cache/frontier.db') or None,
+        run_id=os.getenv('SCRAPER_RUN_ID') or None,
+        time_budget=float(os.getenv('SCRAPER_TIME_BUDGET', '0')) or None,
+        metrics_path=os.getenv('SCRAPER_METRICS') or None
+    )
+    total = result['vehicles']
     
-    uploader = GoogleSheetsUploader(google_creds, sheet_id)
-    success = uploader.upload_vehicles(vehicles)
+    logger.info(f"\n{'='*120}")
+    logger.info(f"SCRAPING COMPLETE - Total vehicles: {total}")
+    for report in result['reports']:
+        logger.info(f"  {report['dealer']}: {report['count']} vehicles")
+        for line in report['summary']:
+            logger.info(f"    {line}")
+        if report.get('error'):
+            logger.error(f"    ❌ {report['error']}")
+    if not result['complete']:
+        logger.warning("  ⚠️  Inventory incomplete; sold vehicles were not removed")
+    if result.get('frontier'):
+        logger.info(f"  {result['frontier']}")
+    logger.info("  Outputs:")
+    for line in result['outputs']:
+        logger.info(f"    {line}")
+    logger.info(f"{'='*120}")
     
-    if success:
+    if result['error']:
+        logger.error(f"\n❌ Run {result['run_id']} failed; rerun to resume it")
+        sys.exit(1)
+    if not total:
+        logger.warning("\n⚠️  No vehicles scraped.")
+    elif google_creds and sheet_id:
         logger.info("\n✅ Successfully completed scraping and upload!")
-        logger.info(f"   Total vehicles uploaded: {len(vehicles)}")
         logger.info(f"   Google Sheet: https://docs.google.com/spreadsheets/d/{sheet_id}")
-    else:
-        logger.error("\n❌ Failed to upload to Google Sheets")
 
 if __name__ == "__main__":
     main()
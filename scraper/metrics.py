@@ -0,0 +1,195 @@
+"""
+Run metrics: counters and latency histograms for each pipeline stage
+(fetch phases, parse, extraction, sink batches), mergeable across worker
+processes and exported as a JSON report or Prometheus text.
+
+Metric names may carry labels, written the Prometheus way:
+    metrics.observe('parse_seconds', 0.004, page='vehicle')
+    with metrics.timer('sink_batch_seconds', sink='sheets'):
+        ...
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from a sub-millisecond extraction step to a slow Sheets call
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_PREFIX = 'scraper_'
+
+
+def metric_key(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{key}="{value}"' for key, value in sorted(labels.items())) + '}'
+
+
+def split_key(key):
+    """'name{a="b"}' -> ('name', 'a="b"')"""
+    name, _, labels = key.partition('{')
+    return name, labels.rstrip('}')
+
+
+class Histogram:
+    """Bucketed observations with count, sum and max; quantiles are interpolated"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.buckets[index - 1] if index else 0.0
+                high = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(self.max, low + (high - low) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+    def merge(self, data):
+        if tuple(data['buckets']) != self.buckets:
+            raise ValueError("Histogram buckets differ")
+        self.counts = [a + b for a, b in zip(self.counts, data['counts'])]
+        self.count += data['count']
+        self.total += data['sum']
+        self.max = max(self.max, data['max'])
+
+    def to_dict(self):
+        return {'buckets': list(self.buckets), 'counts': list(self.counts),
+                'count': self.count, 'sum': self.total, 'max': self.max}
+
+    def stats(self):
+        """count, total, mean and p50 / p90 / p99 / max, in milliseconds"""
+        ms = lambda seconds: None if seconds is None else round(seconds * 1000, 2)
+        return {
+            'count': self.count,
+            'total_ms': ms(self.total),
+            'mean_ms': ms(self.total / self.count) if self.count else None,
+            'p50_ms': ms(self.quantile(0.5)),
+            'p90_ms': ms(self.quantile(0.9)),
+            'p99_ms': ms(self.quantile(0.99)),
+            'max_ms': ms(self.max),
+        }
+
+
+class Metrics:
+    """Thread-safe registry of counters and histograms"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def count(self, name, value=1, **labels):
+        key = metric_key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = metric_key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    # -- combining and exporting ----------------------------------------
+
+    def to_dict(self):
+        """Picklable state, e.g. to ship from a worker process (see merge)"""
+        with self.lock:
+            return {'counters': dict(self.counters),
+                    'histograms': {key: h.to_dict() for key, h in self.histograms.items()}}
+
+    def merge(self, data):
+        """Add another registry's to_dict() into this one"""
+        if not data:
+            return
+        with self.lock:
+            for key, value in data.get('counters', {}).items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, state in data.get('histograms', {}).items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(state['buckets'])
+                histogram.merge(state)
+
+    def report(self):
+        """JSON-friendly run report: counters and per-stage timing stats"""
+        with self.lock:
+            return {'counters': dict(sorted(self.counters.items())),
+                    'timings': {key: self.histograms[key].stats() for key in sorted(self.histograms)}}
+
+    def prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        typed = set()
+        with self.lock:
+            for key in sorted(self.counters):
+                name, labels = split_key(key)
+                name = f'{PROMETHEUS_PREFIX}{name}_total'
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f'# TYPE {name} counter')
+                lines.append(f'{name}{{{labels}}} {self.counters[key]}' if labels else
+                             f'{name} {self.counters[key]}')
+            for key in sorted(self.histograms):
+                histogram = self.histograms[key]
+                name, labels = split_key(key)
+                name = PROMETHEUS_PREFIX + name
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f'# TYPE {name} histogram')
+                prefix = labels + ',' if labels else ''
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                suffix = f'{{{labels}}}' if labels else ''
+                lines.append(f'{name}_sum{suffix} {histogram.total:.6f}')
+                lines.append(f'{name}_count{suffix} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Save the report: Prometheus text for .prom / .txt, JSON otherwise"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith(('.prom', '.txt')):
+                f.write(self.prometheus())
+            else:
+                json.dump(self.report(), f, indent=2)
+
+    def summary(self):
+        """One line per timed stage, slowest total first"""
+        report = self.report()
+        timings = sorted(report['timings'].items(), key=lambda item: -(item[1]['total_ms'] or 0))
+        return [f"{key}: n={s['count']} total={s['total_ms'] / 1000:.2f}s "
+                f"p50={s['p50_ms']}ms p99={s['p99_ms']}ms max={s['max_ms']}ms"
+                for key, s in timings]
@@ -0,0 +1,196 @@
+"""Crawl many dealer sites in parallel worker processes"""
+import logging
+import os
+import queue
+
+from .sites import SiteProfile, get_site
+
+logger = logging.getLogger(__name__)
+
+
+def dealer_options(options, site):
+    """Per-dealer copy of the scraper options; state files must not be shared"""
+    options = dict(options or {})
+    path = options.get('fingerprint_path')
+    if path:
+        stem, ext = os.path.splitext(path)
+        options['fingerprint_path'] = f'{stem}-{site.name}{ext or ".json"}'
+    return options
+
+
+def run_summary(scraper):
+    summary = []
+    if scraper.failures:
+        reasons = {}
+        for failure in scraper.failures.values():
+            reasons[failure.reason] = reasons.get(failure.reason, 0) + 1
+        summary.append(f"Fetch failures: {len(scraper.failures)} ("
+                       + ', '.join(f'{reason}: {count}' for reason, count in sorted(reasons.items())) + ")")
+    if scraper.links.stats['urls']:
+        summary.append(scraper.links.summary())
+    if scraper.cache:
+        summary.append(scraper.cache.summary())
+    if scraper.fingerprints:
+        summary.append(scraper.fingerprints.summary())
+        summary.append(f"Removed since last run: {len(scraper.removed_urls)}")
+    return summary
+
+
+def iter_dealer(site, options=None):
+    """
+    Stream one dealer's vehicles, tagged with the 'dealer' column. Returns
+    (generator, report); the report's count/summary/complete fill in as the
+    generator is consumed.
+    """
+    # Imported here so the parent process doesn't pay for bs4/requests twice
+    from .vehicle_scraper import VehicleScraper
+
+    report = {'dealer': site.name, 'count': 0, 'summary': [], 'complete': False}
+
+    def records():
+        scraper = VehicleScraper(site, **dealer_options(options, site))
+        try:
+            for vehicle in scraper.iter_site():
+                vehicle.dealer = site.name
+                report['count'] += 1
+                yield vehicle
+        finally:
+            report['summary'] = run_summary(scraper)
+            report['complete'] = scraper.complete
+            report['metrics'] = scraper.metrics.to_dict()
+            report['fetches_saved'] = scraper.links.saved
+            report['failures'] = [{'url': failure.url, 'reason': failure.reason, 'status': failure.status,
+                                   'attempts': failure.attempts, 'error': failure.error}
+                                  for failure in scraper.failures.values()]
+            scraper.transport.close()
+
+    return records(), report
+
+
+def put_until(channel, item, stop):
+    """channel.put that gives up once `stop` is set; False if it did"""
+    while not stop.is_set():
+        try:
+            channel.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def stream_dealer(site, options, channel, stop):
+    """
+    Worker-process body: push ('vehicle', record) then ('done', report) onto
+    `channel`. Stops scraping once the consumer sets `stop`, instead of
+    blocking forever on a full channel nobody reads.
+    """
+    report = {'dealer': site.name, 'count': 0, 'summary': [], 'complete': False}
+    try:
+        records, report = iter_dealer(site, options)
+        for vehicle in records:
+            if not put_until(channel, ('vehicle', vehicle), stop):
+                # Closes the generator, so the scraper saves its cache and fingerprints
+                break
+    except Exception as e:
+        report['error'] = str(e)
+    finally:
+        put_until(channel, ('done', report), stop)
+
+
+class DealerStream:
+    """
+    Iterator over the vehicles of several dealers as they're scraped.
+
+    Each dealer runs in its own process with its own per-host rate limiter,
+    so politeness budgets hold while throughput grows with cores and hosts.
+    Workers hand records over a bounded queue: when the consumer (the sinks)
+    falls behind, workers block on put() and memory stays flat. After
+    iteration, `reports` has one dict per dealer (in `sites` order) and
+    `complete` tells whether every dealer's inventory was fully seen.
+    """
+
+    def __init__(self, sites, processes=None, options=None, queue_size=256):
+        self.sites = [site if isinstance(site, SiteProfile) else get_site(site) for site in sites]
+        self.processes = processes or min(len(self.sites), os.cpu_count() or 1)
+        self.options = options
+        self.queue_size = queue_size
+        self.by_dealer = {}
+
+    @property
+    def reports(self):
+        return [self.by_dealer[site.name] for site in self.sites if site.name in self.by_dealer]
+
+    @property
+    def complete(self):
+        reports = self.reports
+        return len(reports) == len(self.sites) and all(
+            report['complete'] and not report.get('error') for report in reports)
+
+    def __iter__(self):
+        if self.processes <= 1 or len(self.sites) == 1:
+            return self.iter_in_process()
+        return self.iter_processes()
+
+    def iter_in_process(self):
+        for site in self.sites:
+            records, self.by_dealer[site.name] = iter_dealer(site, self.options)
+            yield from records
+
+    def iter_processes(self):
+        # Imported here: the in-process path (serverless) never starts workers
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with multiprocessing.Manager() as manager, \
+                ProcessPoolExecutor(max_workers=self.processes) as pool:
+            channel = manager.Queue(self.queue_size)
+            stop = manager.Event()
+            futures = [pool.submit(stream_dealer, site, self.options, channel, stop) for site in self.sites]
+            running = len(futures)
+            try:
+                while running:
+                    try:
+                        kind, payload = channel.get(timeout=1)
+                    except queue.Empty:
+                        # A worker that died hard never sends 'done'
+                        if all(future.done() for future in futures) and channel.empty():
+                            break
+                        continue
+                    if kind == 'vehicle':
+                        yield payload
+                        continue
+                    running -= 1
+                    self.by_dealer[payload['dealer']] = payload
+                    if payload.get('error'):
+                        logger.error(f"❌ {payload['dealer']}: crawl failed: {payload['error']}")
+                    else:
+                        logger.info(f"✓ {payload['dealer']}: {payload['count']} vehicles")
+            except BaseException:
+                # The consumer stopped early (closed us, or a sink raised):
+                # release workers blocked on the full channel, then let the
+                # pool shut down without starting dealers still queued
+                stop.set()
+                while True:
+                    try:
+                        channel.get_nowait()
+                    except queue.Empty:
+                        break
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+
+        for site in self.sites:
+            self.by_dealer.setdefault(site.name, {
+                'dealer': site.name, 'count': 0, 'summary': [], 'complete': False,
+                'error': 'worker process exited unexpectedly'})
+
+
+def crawl_dealers(sites, processes=None, options=None):
+    """
+    Crawl every site (SiteProfile or registered name) and collect the
+    results into one list tagged with a 'dealer' column. Vehicles of one
+    dealer stay in URL order; with several processes, dealers interleave.
+    Returns (vehicles, reports). Use DealerStream to avoid holding the list.
+    """
+    stream = DealerStream(sites, processes, options)
+    vehicles = list(stream)
+    return vehicles, stream.reports
@@ -0,0 +1,151 @@
+"""Discover and walk every page of an inventory listing"""
+import logging
+import math
+import re
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from .extractor import scan_page
+from .html_backend import iter_hrefs, node_attr, select_all
+
+logger = logging.getLogger(__name__)
+
+PAGE_PARAMS = ('page', 'pg', 'p', 'pagenum', 'page_no')
+PAGE_PARAM_RE = re.compile(r'[?&](' + '|'.join(PAGE_PARAMS) + r')=(\d+)', re.I)
+RESULT_COUNT_RE = re.compile(r'\b(\d[\d,]*)\s+(?:vehicles?|results?|matches|cars|units)\b', re.I)
+# A "N vehicles" count may be site-wide (header, footer): look at most this
+# many worker windows past the highest linked page, then further only while
+# pages keep adding vehicles
+COUNT_WINDOWS = 2
+
+
+class Paginator:
+    """
+    Reads the first listing page for pagination hints (rel="next", page-number
+    links, "123 vehicles" counts), then fetches the remaining pages in
+    concurrent windows of `max_workers`, stopping at the first page that
+    yields no new vehicle links or no longer exists (404/410).
+    """
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.pages_fetched = 0
+        # Last page by the "N vehicles" count, before clamping
+        self.estimate = 0
+
+    def crawl(self, root_url):
+        """Return (vehicle links, complete) for every page under root_url"""
+        doc = self.scraper.get_page(root_url)
+        self.pages_fetched += 1
+        if doc is None:
+            return set(), False
+
+        first_links = self.scraper.process_listing(doc)
+        seen = set(first_links)
+        logger.info(f"Scanned: {root_url}\n  → Found {len(first_links)} vehicles\n")
+
+        param, current = self.page_param(root_url)
+        last = self.last_page_hint(doc, root_url, param, current, len(first_links), count_results=True)
+        # No hint at all (e.g. pagination rendered by JavaScript): keep
+        # probing the next pages until one adds nothing. One page first, so
+        # a single-page listing costs one extra request, then whole windows
+        probing = last == current and bool(first_links)
+        if probing:
+            last = current + 1
+            logger.info(f"  Pagination: no hints on {root_url}, probing further pages")
+        elif last > current:
+            logger.info(f"  Pagination: {root_url} has about {last} pages")
+
+        complete = True
+        page = current + 1
+        while page <= last:
+            batch = list(range(page, min(last, page + self.scraper.max_workers - 1) + 1))
+            results = self.scraper.map_concurrent(
+                lambda n: self.scan_page_number(root_url, param, current, n), batch)
+            exhausted = False
+            for n, (links, hint) in zip(batch, results):
+                if links is None:
+                    # Probing, or a hint that overestimated the page count
+                    if self.past_end(self.page_url(root_url, param, n)):
+                        logger.info(f"  Page {n} doesn't exist, stopping")
+                        # Later pages of the window ran past the end too
+                        for later in batch[batch.index(n) + 1:]:
+                            self.past_end(self.page_url(root_url, param, later))
+                        exhausted = True
+                        break
+                    complete = False
+                    continue
+                new = set(links) - seen
+                if not new:
+                    logger.info(f"  Page {n} added no new vehicles, stopping")
+                    exhausted = True
+                    break
+                seen.update(new)
+                last = max(last, hint, n + self.scraper.max_workers if probing else 0)
+                # Still finding vehicles: follow the count a window further
+                if n < self.estimate:
+                    last = max(last, min(self.estimate, n + self.scraper.max_workers))
+            if exhausted:
+                break
+            page = batch[-1] + 1
+
+        return seen, complete
+
+    def scan_page_number(self, root_url, param, current, n):
+        url = self.page_url(root_url, param, n)
+        # Past the last page is how a crawl normally ends; not an error
+        doc = self.scraper.get_page(url, quiet_gone=True)
+        self.pages_fetched += 1
+        if doc is None:
+            return None, 0
+        links = self.scraper.process_listing(doc)
+        logger.info(f"Scanned: {url}\n  → Found {len(links)} vehicles\n")
+        return links, self.last_page_hint(doc, root_url, param, current, len(links))
+
+    def past_end(self, url):
+        """Whether url 404/410ed: the crawl ran past the last page, which isn't a failure"""
+        with self.scraper.failures_lock:
+            failure = self.scraper.failures.get(url)
+            if failure is None or not failure.gone:
+                return False
+            del self.scraper.failures[url]
+        return True
+
+    def page_param(self, url):
+        """Name and value of the page query parameter in url (default page=1)"""
+        for key, value in parse_qsl(urlsplit(url).query):
+            if key.lower() in PAGE_PARAMS and value.isdigit():
+                return key, int(value)
+        return 'page', 1
+
+    def page_url(self, root_url, param, n):
+        parts = urlsplit(root_url)
+        query = [(k, v) for k, v in parse_qsl(parts.query) if k != param]
+        if n > 1:
+            query.append((param, str(n)))
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    def last_page_hint(self, doc, root_url, param, current, per_page, count_results=False):
+        """Highest page number the document points at"""
+        root_path = urlsplit(root_url).path
+        last = current
+
+        hrefs = list(iter_hrefs(doc))
+        for node in select_all(doc, 'a[rel~=next], link[rel~=next]'):
+            href = node_attr(node, 'href')
+            if href:
+                hrefs.append(href)
+        for href in hrefs:
+            match = PAGE_PARAM_RE.search(href)
+            if match and match.group(1).lower() == param.lower():
+                if urlsplit(urljoin(root_url, href)).path == root_path:
+                    last = max(last, int(match.group(2)))
+
+        # "142 vehicles" / 24 per page, only worth the text walk on page one.
+        # Clamped, since the first count on the page may not be this listing's
+        if count_results and per_page:
+            match = RESULT_COUNT_RE.search(scan_page(doc).text)
+            if match:
+                total = int(match.group(1).replace(',', ''))
+                self.estimate = current - 1 + math.ceil(total / per_page)
+                last = max(last, min(self.estimate, last + COUNT_WINDOWS * self.scraper.max_workers))
+        return last
@@ -0,0 +1,236 @@
+"""
+One scrape run (or one time-boxed slice of it) from configuration to
+sinks, shared by the command-line entry point and the Vercel function.
+"""
+import logging
+import os
+import time
+from collections import deque
+
+from .frontier import Frontier, UPLOADED
+from .metrics import Metrics
+from .orchestrator import DealerStream
+from .sinks import SheetsSink, ThreadedSink, make_sink, run_pipeline
+from .sites import load_sites
+from .vehicle import Vehicle
+
+logger = logging.getLogger(__name__)
+
+
+def sites_from_env():
+    """Dealer sites to crawl (registered profiles, optionally from a JSON file)"""
+    if os.getenv('SCRAPER_SITES_FILE'):
+        load_sites(os.getenv('SCRAPER_SITES_FILE'))
+    return [name.strip() for name in os.getenv('SCRAPER_SITES', 'reddeertoyota').split(',') if name.strip()]
+
+
+def options_from_env():
+    """Scraper options (worker count and per-host rate are tunable from the env)"""
+    return dict(
+        max_workers=int(os.getenv('SCRAPER_WORKERS', '4')),
+        requests_per_second=float(os.getenv('SCRAPER_RATE', '1.0')),
+        burst=int(os.getenv('SCRAPER_BURST', '1')),
+        cache_dir=os.getenv('SCRAPER_CACHE_DIR', '.cache/http') or None,
+        fingerprint_path=os.getenv('SCRAPER_FINGERPRINTS', '.cache/fingerprints.json') or None,
+        parser=os.getenv('SCRAPER_PARSER', 'html.parser'),
+        listing_only=os.getenv('SCRAPER_LISTING_ONLY', '') == '1',
+        detail_refresh_days=float(os.getenv('SCRAPER_DETAIL_REFRESH_DAYS', '0')) or None,
+        quiet=os.getenv('SCRAPER_QUIET', '') == '1',
+        connect_timeout=float(os.getenv('SCRAPER_CONNECT_TIMEOUT', '5')),
+        read_timeout=float(os.getenv('SCRAPER_READ_TIMEOUT', '20')),
+        retries=int(os.getenv('SCRAPER_RETRIES', '3')),
+        max_page_bytes=int(float(os.getenv('SCRAPER_MAX_PAGE_MB', '5')) * 1024 * 1024)
+    )
+
+
+class Delivered:
+    """
+    Pass a record stream through, remembering the link of every record the
+    sinks took. Pages parsed but still in flight at a deadline never reach
+    the sinks, so only these may be marked uploaded in the frontier.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.links = []
+
+    def __iter__(self):
+        for vehicle in self.stream:
+            yield vehicle
+            self.links.append(vehicle.link)
+
+    @property
+    def complete(self):
+        return self.stream.complete
+
+
+class ProgressTracker:
+    """
+    Sink-shaped observer that reports run progress to a callback, at most
+    every `interval` seconds: pages fetched and total (from the frontier
+    when there is one), vehicles parsed, rows uploaded (Sheets if
+    configured, else the slowest sink) and an ETA from the rate so far.
+    The last `keep` records are kept as partial results.
+    """
+
+    name = 'progress'
+    failed = False
+
+    def __init__(self, callback, sinks, frontier=None, run_id=None, interval=0.5, keep=50):
+        self.callback = callback
+        self.sinks = sinks
+        self.frontier = frontier
+        self.run_id = run_id
+        self.interval = interval
+        self.recent = deque(maxlen=keep)
+        self.vehicles = 0
+        self.started = time.monotonic()
+        self.last_report = 0.0
+        self.pages_before = self.fetched_pages()[0]
+        self.report('listing')
+
+    def fetched_pages(self):
+        if not self.frontier:
+            return self.vehicles, None
+        counts = self.frontier.progress(self.run_id)
+        return counts['total'] - counts['discovered'], counts['total']
+
+    def rows_uploaded(self):
+        sheets = [sink for sink in self.sinks if sink.name == 'sheets']
+        counted = sheets or self.sinks
+        return min(sink.written for sink in counted) if counted else 0
+
+    def report(self, stage='scraping'):
+        self.last_report = time.monotonic()
+        elapsed = self.last_report - self.started
+        pages, total = self.fetched_pages()
+        done = pages - self.pages_before
+        eta = None
+        if total is not None and done > 0:
+            eta = round((total - pages) * elapsed / done, 1)
+        self.callback({
+            'stage': stage,
+            'pages_fetched': pages,
+            'pages_total': total,
+            'vehicles_parsed': self.vehicles,
+            'rows_uploaded': self.rows_uploaded(),
+            'elapsed_seconds': round(elapsed, 1),
+            'eta_seconds': eta,
+            'recent': list(self.recent),
+        })
+
+    def write(self, record):
+        self.vehicles += 1
+        self.recent.append(record.to_dict())
+        if time.monotonic() - self.last_report >= self.interval:
+            self.report()
+
+    def close(self, complete=True):
+        pass
+
+
+def run_scrape(sites, options=None, outputs='tsv:vehicles.tsv,sqlite:.cache/inventory.db',
+               google_creds=None, sheet_id=None, sheets_batch_size=50, sheets_per_dealer=False,
+               processes=None, frontier_path=None, run_id=None, time_budget=None, max_age_hours=24,
+               progress=None, metrics_path=None):
+    """
+    Crawl `sites` and stream the records into the sinks named in `outputs`
+    (comma list of kind:path) and, with credentials, Google Sheets.
+
+    sheets_per_dealer: give every dealer its own worksheet, written
+        concurrently, instead of one shared 'Vehicle Inventory' sheet
+    frontier_path: keep per-URL progress there. The run resumes `run_id`,
+        or the newest unfinished run of these dealers, or starts a new one.
+    time_budget: seconds after which no new vehicle page is started; the
+        call returns and a later call with the same run ID continues.
+    progress: callable receiving ProgressTracker snapshots (dicts) while
+        the run goes on, and a final one with stage 'done'.
+    metrics_path: write the run's metrics report there (Prometheus text
+        for .prom / .txt, JSON otherwise)
+
+    Returns a result dict: run_id, resumed, vehicles, complete, finished
+    (no work left for another slice, even if incomplete), reports,
+    outputs (sink summaries), progress (frontier state counts), metrics
+    (counters and per-stage timings of every dealer and sink),
+    fetches_saved (detail fetches the link dedup avoided), error.
+    """
+    options = dict(options or {})
+    frontier = Frontier(frontier_path) if frontier_path else None
+    resumed = False
+    started_at = None
+    if frontier:
+        run_id, resumed = frontier.start_run(sites, run_id, max_age_hours)
+        started_at = frontier.started_at(run_id)
+        options.update(frontier_path=frontier_path, run_id=run_id)
+        logger.info(f"{'Resuming' if resumed else 'Starting'} run {run_id}")
+    if time_budget:
+        options['deadline'] = time.time() + time_budget
+
+    metrics = Metrics()
+    sinks = [make_sink(spec, append=resumed, started_at=started_at)
+             for spec in (outputs or '').split(',') if spec.strip()]
+    for sink in sinks:
+        sink.metrics = metrics
+    if google_creds and sheet_id:
+        # Imported here: google-auth is only needed when uploading
+        from .sheets_uploader import GoogleSheetsUploader
+        known_keys = ()
+        if resumed:
+            # Rows earlier slices synced must survive the sold-vehicle cleanup
+            known_keys = [Vehicle.from_dict(data).key()
+                          for data in frontier.records(run_id, states=(UPLOADED,))]
+        uploader = GoogleSheetsUploader(google_creds, sheet_id)
+        sheets = SheetsSink(uploader, batch_size=sheets_batch_size, known_keys=known_keys,
+                            dealers=sites, per_dealer=sheets_per_dealer)
+        sheets.metrics = metrics
+        # Sheets round trips are slow; keep them off the crawl thread
+        sinks.append(ThreadedSink(sheets))
+
+    logger.info(f"\nScraping {len(sites)} dealer site(s): {', '.join(sites)}")
+    stream = DealerStream(sites, processes=processes, options=options)
+    result = {'run_id': run_id, 'resumed': resumed, 'vehicles': 0, 'complete': False, 'finished': False,
+              'error': None}
+    delivered = Delivered(stream)
+    tracker = ProgressTracker(progress, sinks, frontier, run_id) if progress else None
+    started = time.perf_counter()
+    try:
+        # The tracker goes last: it sees a record once every sink has it
+        result['vehicles'] = run_pipeline(delivered, sinks + [tracker] if tracker else sinks)
+        result['complete'] = stream.complete
+        failed = [sink.name for sink in sinks if sink.failed]
+        if failed:
+            # Parsed records stay 'parsed' and are re-sent by the next slice
+            result['error'] = f"sink(s) failed: {', '.join(failed)}"
+        elif frontier:
+            # The sinks closed cleanly
+            frontier.mark_uploaded(run_id, delivered.links)
+            # An incomplete run with nothing left to retry is over too; it
+            # just never got to drop the sold vehicles
+            if stream.complete or not frontier.remaining(run_id):
+                frontier.finish_run(run_id)
+                result['finished'] = True
+        else:
+            result['finished'] = True
+    except Exception as e:
+        logger.error(f"❌ Run failed: {e}")
+        result['error'] = str(e)
+    metrics.observe('run_seconds', time.perf_counter() - started)
+    metrics.count('vehicles', result['vehicles'])
+    result['reports'] = stream.reports
+    for report in result['reports']:
+        metrics.merge(report.get('metrics'))
+    result['metrics'] = metrics.report()
+    result['fetches_saved'] = sum(report.get('fetches_saved', 0) for report in result['reports'])
+    for line in metrics.summary():
+        logger.info(f"  ⏱ {line}")
+    if metrics_path:
+        metrics.write(metrics_path)
+        logger.info(f"Metrics report: {metrics_path}")
+    result['outputs'] = [sink.summary() for sink in sinks]
+    if tracker:
+        tracker.report('done')
+    if frontier:
+        result['progress'] = frontier.progress(run_id)
+        result['frontier'] = frontier.summary(run_id)
+        frontier.close()
+    return result
@@ -0,0 +1,180 @@
+"""
+Diff-based Google Sheets sync: compare the rows already in the sheet with
+the freshly scraped ones and express only the difference as batchUpdate
+requests.
+"""
+from .vehicle import COLUMNS, Vehicle
+
+HEADERS = list(COLUMNS)
+
+HEADER_FORMAT = {
+    'textFormat': {'bold': True},
+    'backgroundColor': {'red': 0.2, 'green': 0.6, 'blue': 0.9},
+    'horizontalAlignment': 'CENTER'
+}
+
+
+def row_key(row, headers):
+    """VIN, else stock number, else link identifies a vehicle row"""
+    for column in ('vin', 'id / stock-#', 'link'):
+        value = row[headers.index(column)].strip()
+        if value:
+            return f'{column}:{value.upper() if column == "vin" else value}'
+    return None
+
+
+def vehicle_row(vehicle, headers=HEADERS):
+    if isinstance(vehicle, Vehicle) and headers == HEADERS:
+        return vehicle.row()
+    values = (vehicle.get(header) for header in headers)
+    return ['' if value is None else str(value) for value in values]
+
+
+class SyncPlan:
+    """Row-level changes between the sheet and the new data"""
+
+    def __init__(self):
+        self.write_header = False
+        self.updates = []   # (sheet row index, values)
+        self.inserts = []   # values, appended after the last row
+        self.deletes = []   # sheet row indexes
+        self.unchanged = 0
+
+    def is_empty(self):
+        return not (self.write_header or self.updates or self.inserts or self.deletes)
+
+    def summary(self):
+        return (f"{len(self.inserts)} inserted, {len(self.updates)} updated, "
+                f"{len(self.deletes)} deleted, {self.unchanged} unchanged")
+
+    def apply(self, existing, headers=HEADERS):
+        """
+        The sheet's values once build_requests(plan) has run, computed
+        locally, so the next micro-batch can be planned without a re-read
+        """
+        values = [list(row) for row in existing]
+        if self.write_header:
+            if values:
+                values[0] = list(headers)
+            else:
+                values.append(list(headers))
+        for index, row in self.updates:
+            values[index] = list(row)
+        for index in reversed(self.deletes):
+            del values[index]
+        values.extend(list(row) for row in self.inserts)
+        return values
+
+
+def plan_sync(existing, rows, headers=HEADERS, delete_missing=True, keep_keys=None, dealers=None):
+    """
+    existing: the sheet's current values (header first), as get_all_values()
+    rows: new data rows, in `headers` order
+    delete_missing: drop sheet rows whose vehicle is not in `rows`
+    keep_keys: row keys that count as present although not in `rows`
+        (vehicles already written by earlier micro-batches of the same run)
+    dealers: only rows of these dealers count as missing; other dealers'
+        rows weren't crawled, so their absence says nothing
+    """
+    plan = SyncPlan()
+    width = len(headers)
+
+    current = {}
+    sheet_header = existing[0] if existing else []
+    # A sheet whose header is a prefix of ours only lacks the newer columns
+    if sheet_header and sheet_header == headers[:len(sheet_header)]:
+        plan.write_header = len(sheet_header) < width
+        for index, values in enumerate(existing[1:], start=1):
+            values = (values + [''] * width)[:width]
+            key = row_key(values, headers)
+            if key is None or key in current:
+                # Blank or duplicate rows are leftovers; clean them up
+                if delete_missing:
+                    plan.deletes.append(index)
+                continue
+            current[key] = (index, values)
+    else:
+        # Missing or different header: the old layout can't be diffed
+        plan.write_header = True
+        plan.deletes.extend(range(1, len(existing)))
+
+    seen = set()
+    for values in rows:
+        key = row_key(values, headers)
+        if key in seen:
+            continue
+        seen.add(key)
+        if key in current:
+            index, old = current[key]
+            if old == values:
+                plan.unchanged += 1
+            else:
+                plan.updates.append((index, values))
+        else:
+            plan.inserts.append(values)
+
+    if delete_missing:
+        keep = seen | set(keep_keys or ())
+        dealer = headers.index('dealer')
+        plan.deletes.extend(index for key, (index, values) in current.items()
+                            if key not in keep and (dealers is None or values[dealer] in dealers))
+    plan.deletes.sort()
+    return plan
+
+
+def cell_row(values):
+    return {'values': [{'userEnteredValue': {'stringValue': value}} for value in values]}
+
+
+def contiguous(items, index=lambda item: item):
+    """Split sorted items into runs of consecutive indexes"""
+    run = []
+    for item in items:
+        if run and index(item) != index(run[-1]) + 1:
+            yield run
+            run = []
+        run.append(item)
+    if run:
+        yield run
+
+
+def build_requests(plan, sheet_id, headers=HEADERS, column_count=None):
+    """batchUpdate requests applying `plan`, in an order that keeps row indexes valid"""
+    requests = []
+    width = len(headers)
+
+    if column_count is not None and column_count < width:
+        requests.append({'appendDimension': {
+            'sheetId': sheet_id, 'dimension': 'COLUMNS', 'length': width - column_count}})
+
+    if plan.write_header:
+        requests.append({'updateCells': {
+            'start': {'sheetId': sheet_id, 'rowIndex': 0, 'columnIndex': 0},
+            'rows': [cell_row(headers)],
+            'fields': 'userEnteredValue'}})
+        requests.append({'repeatCell': {
+            'range': {'sheetId': sheet_id, 'startRowIndex': 0, 'endRowIndex': 1,
+                      'startColumnIndex': 0, 'endColumnIndex': width},
+            'cell': {'userEnteredFormat': HEADER_FORMAT},
+            'fields': 'userEnteredFormat(textFormat,backgroundColor,horizontalAlignment)'}})
+
+    # Updates address rows by their current index, so they go before deletes
+    for run in contiguous(sorted(plan.updates), index=lambda update: update[0]):
+        requests.append({'updateCells': {
+            'start': {'sheetId': sheet_id, 'rowIndex': run[0][0], 'columnIndex': 0},
+            'rows': [cell_row(values) for _, values in run],
+            'fields': 'userEnteredValue'}})
+
+    # Bottom-up so earlier deletes don't shift the rows of later ones
+    for run in reversed(list(contiguous(plan.deletes))):
+        requests.append({'deleteDimension': {'range': {
+            'sheetId': sheet_id, 'dimension': 'ROWS',
+            'startIndex': run[0], 'endIndex': run[-1] + 1}}})
+
+    if plan.inserts:
+        requests.append({'appendCells': {
+            'sheetId': sheet_id,
+            'rows': [cell_row(values) for values in plan.inserts],
+            'fields': 'userEnteredValue'}})
+
+    return requests
@@ -0,0 +1,207 @@
+"""
+Minimal Sheets v4 REST client with quota-aware batching and retries.
+
+Writes are packed into as few spreadsheets.batchUpdate calls as the cell and
+payload limits allow. 429 and 5xx responses are retried with exponential
+backoff and full jitter, honouring Retry-After. A batchUpdate is only
+replayed when it cannot have been applied (429, or no connection made);
+other failures raise SheetsWriteUnknown so the caller can re-read first.
+The API base URL can point at a local fake endpoint (see
+benchmarks/fake_sheets.py).
+"""
+import json
+import logging
+import random
+import threading
+import time
+from urllib.parse import quote
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from .rate_limiter import TokenBucket
+from .transport import retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = 'https://sheets.googleapis.com/v4'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Google rejects payloads over 10MB and recommends staying near 2MB
+MAX_BATCH_BYTES = 2 * 1024 * 1024
+MAX_BATCH_CELLS = 50000
+
+
+class SheetsAPIError(Exception):
+    def __init__(self, status_code, text):
+        if status_code:
+            super().__init__(f"Sheets API returned {status_code}: {text[:500]}")
+        else:
+            super().__init__(f"Sheets API call failed: {text[:500]}")
+        self.status_code = status_code
+        self.text = text
+
+
+class SheetsWriteUnknown(SheetsAPIError):
+    """A write failed after the server may already have applied it"""
+
+
+def never_sent(error):
+    """True if a requests exception was raised before the request went out"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.Timeout):
+        return False
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class SheetsAPI:
+    def __init__(self, session, spreadsheet_id, api_base=None, max_retries=6,
+                 backoff_base=1.0, backoff_max=64.0, requests_per_minute=60,
+                 max_batch_cells=MAX_BATCH_CELLS, max_batch_bytes=MAX_BATCH_BYTES):
+        """
+        session: an authorized requests session (e.g. google-auth's
+            AuthorizedSession); a plain Session works against a fake endpoint
+        requests_per_minute: client-side throttle under the per-user quota
+        """
+        self.session = session
+        self.spreadsheet_id = spreadsheet_id
+        self.api_base = (api_base or DEFAULT_API_BASE).rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.throttle = TokenBucket(requests_per_minute / 60.0, burst=max(1, requests_per_minute // 10))
+        self.max_batch_cells = max_batch_cells
+        self.max_batch_bytes = max_batch_bytes
+        self.stats = {'calls': 0, 'retries': 0, 'bytes_sent': 0}
+        # Several worksheets may be written at once through one client
+        self.stats_lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self.stats_lock:
+            self.stats[name] += value
+
+    def url(self, suffix=''):
+        return f'{self.api_base}/spreadsheets/{self.spreadsheet_id}{suffix}'
+
+    def request(self, method, url, idempotent=True, **kwargs):
+        """
+        Send one API call, retrying throttling and server errors. A call that
+        is not idempotent is only retried when it cannot have been applied;
+        otherwise SheetsWriteUnknown is raised.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.throttle.acquire()
+            self.count('calls')
+            try:
+                response = self.session.request(method, url, timeout=(10, 120), **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not idempotent and not never_sent(e):
+                    raise SheetsWriteUnknown(None, f"{type(e).__name__}: {e}") from e
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_delay(attempt)
+                self.count('retries')
+                logger.warning(f"Sheets API {type(e).__name__}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            if response.status_code < 400:
+                return response.json() if response.content else {}
+            if not idempotent and response.status_code >= 500:
+                raise SheetsWriteUnknown(response.status_code, response.text)
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                raise SheetsAPIError(response.status_code, response.text)
+
+            delay = self.retry_delay(attempt, response.headers.get('Retry-After'))
+            self.count('retries')
+            logger.warning(f"Sheets API {response.status_code}, retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+
+    def retry_delay(self, attempt, retry_after=None):
+        """Server-requested delay if any, else full-jitter exponential backoff"""
+        seconds = retry_after_seconds(retry_after)
+        if seconds is not None:
+            return min(self.backoff_max, seconds)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get_sheets(self):
+        """Properties (sheetId, title, gridProperties) of every worksheet"""
+        data = self.request('GET', self.url(), params={'fields': 'properties.title,sheets.properties'})
+        return [sheet['properties'] for sheet in data.get('sheets', [])]
+
+    def get_values(self, cell_range):
+        data = self.request('GET', self.url(f'/values/{quote(cell_range, safe="")}'),
+                            params={'valueRenderOption': 'FORMATTED_VALUE'})
+        return data.get('values', [])
+
+    def add_sheet(self, title, rows=1000, cols=26):
+        replies = self.batch_update([{'addSheet': {'properties': {
+            'title': title, 'gridProperties': {'rowCount': rows, 'columnCount': cols}}}}])
+        return replies[0]['addSheet']['properties']
+
+    def batch_update(self, requests):
+        """Apply requests in order, in as few calls as the limits allow; returns all replies"""
+        replies = []
+        for batch in self.pack(requests):
+            body = json.dumps({'requests': batch}).encode('utf-8')
+            self.count('bytes_sent', len(body))
+            # Index-based deletes and appends must not be replayed blindly
+            data = self.request('POST', self.url(':batchUpdate'), idempotent=False, data=body,
+                                headers={'Content-Type': 'application/json'})
+            replies.extend(data.get('replies', []))
+        return replies
+
+    def pack(self, requests):
+        """Group requests into batches under the cell-count and payload-size limits"""
+        batch, cells, size = [], 0, 0
+        for request in requests:
+            for part in self.split(request):
+                part_cells = count_cells(part)
+                part_size = len(json.dumps(part))
+                if batch and (cells + part_cells > self.max_batch_cells or
+                              size + part_size > self.max_batch_bytes):
+                    yield batch
+                    batch, cells, size = [], 0, 0
+                batch.append(part)
+                cells += part_cells
+                size += part_size
+        if batch:
+            yield batch
+
+    def split(self, request):
+        """Break an oversized updateCells/appendCells into row chunks that fit"""
+        kind = next(iter(request))
+        rows = request[kind].get('rows') if kind in ('updateCells', 'appendCells') else None
+        if not rows:
+            return [request]
+
+        parts, chunk, cells, size = [], [], 0, 0
+        first_row = 0
+        for i, row in enumerate(rows):
+            row_cells = len(row.get('values', []))
+            row_size = len(json.dumps(row))
+            if chunk and (cells + row_cells > self.max_batch_cells or
+                          size + row_size > self.max_batch_bytes):
+                parts.append(with_rows(request, kind, chunk, first_row))
+                chunk, cells, size, first_row = [], 0, 0, i
+            chunk.append(row)
+            cells += row_cells
+            size += row_size
+        parts.append(with_rows(request, kind, chunk, first_row))
+        return parts
+
+
+def with_rows(request, kind, rows, offset):
+    body = dict(request[kind], rows=rows)
+    if kind == 'updateCells' and offset:
+        start = dict(body['start'])
+        start['rowIndex'] = start.get('rowIndex', 0) + offset
+        body['start'] = start
+    return {kind: body}
+
+
+def count_cells(request):
+    body = next(iter(request.values()))
+    return sum(len(row.get('values', [])) for row in body.get('rows', [])) if isinstance(body, dict) else 0
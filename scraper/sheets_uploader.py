@@ -1,128 +1,202 @@
-import gspread
+from concurrent.futures import ThreadPoolExecutor
+from google.auth.transport.requests import AuthorizedSession
 from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+import hashlib
 import json
 import logging
+import os
+import threading
 import time
 
+from .sheet_sync import HEADERS, vehicle_row, plan_sync, build_requests
+from .sheets_api import SheetsAPI, SheetsAPIError, SheetsWriteUnknown
+
 logger = logging.getLogger(__name__)
 
+WORKSHEET_TITLE = 'Vehicle Inventory'
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Worksheets written at once by upload_worksheets, and the connection pool
+# of the shared session that carries them
+MAX_WRITERS = 8
+
+# Sync attempts per upload when a write fails with an unknown outcome; each
+# retry re-reads the worksheet and re-plans against it
+WRITE_ATTEMPTS = 3
+
+# Process-wide, so warm serverless invocations and every uploader of a
+# multi-dealer run reuse them: the authorized session per service account
+# (google-auth keeps its access token until it expires, then refreshes it
+# in place) and the worksheet properties per spreadsheet
+_cache_lock = threading.Lock()
+_sessions = {}
+_worksheets = {}
+# Spreadsheets whose worksheet list has been read into _worksheets
+_loaded = set()
+
+
+def authorized_session(credentials_json):
+    """(service account email, pooled AuthorizedSession), built once per credentials"""
+    if isinstance(credentials_json, str):
+        raw = credentials_json
+    else:
+        raw = json.dumps(credentials_json, sort_keys=True)
+    digest = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    with _cache_lock:
+        cached = _sessions.get(digest)
+        if cached:
+            return cached
+        credentials_dict = json.loads(raw)
+        creds = Credentials.from_service_account_info(credentials_dict, scopes=SCOPES)
+        session = AuthorizedSession(creds)
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WRITERS))
+        cached = _sessions[digest] = (credentials_dict.get('client_email', 'UNKNOWN'), session)
+        return cached
+
+
+def clear_cache():
+    """Forget cached sessions and worksheets (e.g. after rotating credentials)"""
+    with _cache_lock:
+        _sessions.clear()
+        _worksheets.clear()
+        _loaded.clear()
+
+
 class GoogleSheetsUploader:
-    def __init__(self, credentials_json, sheet_id):
-        """Initialize Google Sheets client"""
-        # Parse credentials
-        if isinstance(credentials_json, str):
-            credentials_dict = json.loads(credentials_json)
-        else:
-            credentials_dict = credentials_json
+    def __init__(self, credentials_json, sheet_id, api_base=None, session=None):
+        """
+        Initialize Google Sheets client. The authorized session and the
+        worksheet lookups are cached per process, so building another
+        uploader for the same account and spreadsheet costs no round trip.
         
-        self.service_email = credentials_dict.get('client_email', 'UNKNOWN')
-        logger.info(f"Service Account Email: {self.service_email}")
-        
-        # Define scopes
-        scopes = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
+        api_base / session: point the uploader at another Sheets endpoint
+        (e.g. benchmarks/fake_sheets.py) with a plain session instead of
+        service-account auth. SHEETS_API_BASE sets api_base from the env.
+        """
+        self.sheet_id = sheet_id
+        api_base = api_base or os.getenv('SHEETS_API_BASE')
         
-        # Create credentials
-        creds = Credentials.from_service_account_info(credentials_dict, scopes=scopes)
+        if session is None:
+            self.service_email, session = authorized_session(credentials_json)
+            logger.info(f"Service Account Email: {self.service_email}")
+        else:
+            self.service_email = 'UNKNOWN'
         
-        # Authorize gspread client
-        self.client = gspread.authorize(creds)
-        self.sheet_id = sheet_id
+        self.api = SheetsAPI(session, sheet_id, api_base=api_base)
+        # title -> the worksheet's values as of our last write. Read once per
+        # uploader (one run), then kept in step locally; other writers
+        # between runs are picked up by the next run's read
+        self.contents = {}
+    
+    def cache_key(self, title):
+        return (self.api.api_base, self.sheet_id, title)
+    
+    def get_worksheet(self, title=WORKSHEET_TITLE):
+        """Properties of the named worksheet, creating it if missing"""
+        worksheet = _worksheets.get(self.cache_key(title))
+        if worksheet:
+            return worksheet
+        # One metadata read fills in every worksheet of the spreadsheet;
+        # the lock keeps concurrent writers from adding the same one twice
+        with _cache_lock:
+            worksheet = _worksheets.get(self.cache_key(title))
+            if worksheet:
+                return worksheet
+            if self.cache_key(None) not in _loaded:
+                for properties in self.api.get_sheets():
+                    _worksheets[self.cache_key(properties['title'])] = properties
+                _loaded.add(self.cache_key(None))
+            worksheet = _worksheets.get(self.cache_key(title))
+            if worksheet:
+                logger.info(f"Found existing '{title}' worksheet")
+            else:
+                logger.info(f"Creating new '{title}' worksheet")
+                worksheet = _worksheets[self.cache_key(title)] = self.api.add_sheet(
+                    title, rows=1000, cols=len(HEADERS))
+            return worksheet
+    
+    def forget_worksheet(self, title):
+        """Drop a cached worksheet, e.g. after it was deleted by hand"""
+        self.contents.pop(title, None)
+        with _cache_lock:
+            _worksheets.pop(self.cache_key(title), None)
+            _loaded.discard(self.cache_key(None))
+    
+    def upload_vehicles(self, vehicles, delete_missing=True, keep_keys=None, title=WORKSHEET_TITLE, dealers=None):
+        """
+        Sync vehicle data to Google Sheets: diff the sheet (read on the first
+        call, then tracked locally) against `vehicles` by VIN / stock number,
+        and apply the inserts, updates and deletes through the batched,
+        retrying write pipeline.
         
-    def upload_vehicles(self, vehicles):
-        """Upload vehicle data to Google Sheets"""
+        A streaming run calls this once per micro-batch with
+        delete_missing=False, then once with no vehicles, delete_missing=True
+        and the keys of everything it wrote, to drop the sold vehicles;
+        `dealers` limits that to the rows of the dealers the run crawled.
+        """
         try:
             logger.info(f"Attempting to open spreadsheet with ID: {self.sheet_id}")
+            worksheet = self.get_worksheet(title)
             
-            # Open the spreadsheet
-            spreadsheet = self.client.open_by_key(self.sheet_id)
-            logger.info(f"Successfully opened spreadsheet: {spreadsheet.title}")
-            
-            # Get or create worksheet
-            try:
-                worksheet = spreadsheet.worksheet('Vehicle Inventory')
-                logger.info("Found existing 'Vehicle Inventory' worksheet")
-            except gspread.WorksheetNotFound:
-                logger.info("Creating new 'Vehicle Inventory' worksheet")
-                worksheet = spreadsheet.add_worksheet(title='Vehicle Inventory', rows=1000, cols=21)
-            
-            # Clear existing data
-            logger.info("Clearing existing data...")
-            worksheet.clear()
-            
-            # Prepare headers
-            headers = [
-                'title', 'id / stock-#', 'price', 'condition', 'feed label',
-                'body style', 'brand', 'certified pre-owned', 'color', 'description',
-                'engine', 'image link', 'link', 'mileage', 'model',
-                'trim / sub-model', 'vehicle MSRP', 'vehicle all in price',
-                'vehicle option', 'vin', 'year'
-            ]
-            
-            # Prepare data rows
-            rows = [headers]
-            logger.info(f"Preparing {len(vehicles)} vehicle rows...")
-            for vehicle in vehicles:
-                row = [str(vehicle.get(header, '')) for header in headers]
-                rows.append(row)
-            
-            logger.info(f"Total rows to upload: {len(rows)} (including header)")
-            
-            # Update worksheet in batches if large dataset
-            if len(rows) > 1000:
-                logger.info("Large dataset detected, uploading in batches...")
-                batch_size = 500
-                for i in range(0, len(rows), batch_size):
-                    batch = rows[i:i + batch_size]
-                    start_row = i + 1
-                    end_row = start_row + len(batch) - 1
-                    cell_range = f'A{start_row}:U{end_row}'
-                    logger.info(f"Uploading batch {i//batch_size + 1}: rows {start_row}-{end_row}")
-                    worksheet.update(cell_range, batch, value_input_option='RAW')
-            else:
-                # Upload all at once
-                logger.info("Uploading all data...")
-                result = worksheet.update('A1', rows, value_input_option='RAW')
-                logger.info(f"Update result: {result}")
+            existing = self.contents.get(title)
+            rows = [vehicle_row(vehicle) for vehicle in vehicles]
+            for attempt in range(WRITE_ATTEMPTS):
+                if existing is None:
+                    # The one read of the current contents this run
+                    existing = self.api.get_values(f"'{title}'")
+                    logger.info(f"'{title}' currently has {len(existing)} rows (including header)")
                 
-                # Add a small delay to ensure data is written
-                time.sleep(2)
-            
-            logger.info("Data uploaded, formatting headers...")
-            
-            # Format headers
-            try:
-                worksheet.format('A1:U1', {
-                    'textFormat': {'bold': True},
-                    'backgroundColor': {'red': 0.2, 'green': 0.6, 'blue': 0.9},
-                    'horizontalAlignment': 'CENTER'
-                })
-                logger.info("Headers formatted successfully")
-            except Exception as format_error:
-                logger.warning(f"Could not format headers: {format_error}")
-            
-            # Force a refresh and verify data was written
-            time.sleep(1)
-            written_rows = worksheet.get_all_values()
-            logger.info(f"Verification: {len(written_rows)} rows in sheet (expected {len(rows)})")
-            
-            if len(written_rows) < 2:
-                logger.error(f"❌ DATA NOT WRITTEN! Only {len(written_rows)} rows found")
-                logger.error(f"⚠️  PERMISSION ISSUE: Make sure you shared the sheet with: {self.service_email}")
-                logger.error(f"   Give it 'Editor' access in Google Sheets Share settings")
-                return False
+                plan = plan_sync(existing, rows, delete_missing=delete_missing, keep_keys=keep_keys,
+                                 dealers=dealers)
+                logger.info(f"Sync plan: {plan.summary()}")
+                
+                if plan.is_empty():
+                    self.contents[title] = existing
+                    logger.info("✓ Sheet already up to date")
+                    return True
+                
+                grid = worksheet.setdefault('gridProperties', {})
+                requests = build_requests(plan, worksheet['sheetId'], column_count=grid.get('columnCount'))
+                # Unknown until the write succeeds; a failed one re-reads next time
+                self.contents.pop(title, None)
+                try:
+                    self.api.batch_update(requests)
+                    break
+                except SheetsWriteUnknown as e:
+                    if attempt + 1 == WRITE_ATTEMPTS:
+                        raise
+                    # Some or all of it may have landed: replaying the same
+                    # row-index deletes would remove the wrong rows, so
+                    # plan again from what the sheet holds now
+                    delay = self.api.retry_delay(attempt)
+                    logger.warning(f"Write to '{title}' may have been applied ({e}); "
+                                   f"re-reading in {delay:.1f}s before retrying")
+                    time.sleep(delay)
+                    existing = None
+            self.contents[title] = plan.apply(existing)
+            # Keep the cached worksheet in step so later batches don't re-append columns
+            grid['columnCount'] = max(grid.get('columnCount') or 0, len(HEADERS))
             
-            logger.info(f"✓ Successfully uploaded {len(vehicles)} vehicles to Google Sheets")
+            stats = self.api.stats
+            logger.info(f"✓ Synced {len(vehicles)} vehicles to '{title}' "
+                        f"({len(requests)} requests, {stats['calls']} API calls, "
+                        f"{stats['retries']} retries, {stats['bytes_sent']} bytes)")
             logger.info(f"✓ Spreadsheet URL: https://docs.google.com/spreadsheets/d/{self.sheet_id}")
-            logger.info(f"✓ First data row: {written_rows[1][:3] if len(written_rows) > 1 else 'NONE'}")
             
             return True
-            
-        except gspread.exceptions.APIError as e:
+        
+        except SheetsAPIError as e:
             logger.error(f"Google Sheets API Error: {e}")
-            logger.error(f"Error details: {e.response.text if hasattr(e, 'response') else 'No details'}")
+            # The cached sheetId may be stale; look it up again next time
+            self.forget_worksheet(title)
+            if e.status_code == 403:
+                logger.error(f"⚠️  PERMISSION ISSUE: Make sure you shared the sheet with: {self.service_email}")
+                logger.error(f"   Give it 'Editor' access in Google Sheets Share settings")
             return False
         except Exception as e:
             logger.error(f"Error uploading to Google Sheets: {e}")
@@ -130,3 +204,14 @@ class GoogleSheetsUploader:
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
             return False
+    
+    def upload_worksheets(self, batches, delete_missing=True, keep_keys=None, dealers=None):
+        """
+        upload_vehicles for several worksheets at once ({title: vehicles}),
+        written concurrently over the shared session. True if all succeeded.
+        """
+        upload = lambda item: self.upload_vehicles(item[1], delete_missing, keep_keys, item[0], dealers)
+        if len(batches) <= 1:
+            return all(map(upload, batches.items()))
+        with ThreadPoolExecutor(max_workers=min(len(batches), MAX_WRITERS)) as executor:
+            return all(list(executor.map(upload, batches.items())))
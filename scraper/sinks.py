@@ -0,0 +1,301 @@
+"""
+Output sinks for the streaming scrape pipeline.
+
+Every record is handed to each sink as soon as it is extracted, so results
+land progressively and a crash late in the crawl keeps what was already
+written. Sinks buffer at most `batch_size` records; the scraper keeps only
+a bounded number of pages in flight, so a slow sink slows the crawl down
+instead of letting memory grow (ThreadedSink moves a slow sink off the
+crawl thread behind a bounded queue).
+"""
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+
+from .inventory_store import InventoryStore
+from .vehicle import COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+class Sink:
+    """Base class: write() records, flush() buffered ones, close() at the end"""
+
+    name = 'sink'
+    failed = False
+    # A Metrics registry to time batches into (sink_batch_seconds), if any
+    metrics = None
+
+    def __init__(self, batch_size=100):
+        self.batch_size = batch_size
+        self.buffer = []
+        self.written = 0
+
+    def write(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            if self.metrics:
+                with self.metrics.timer('sink_batch_seconds', sink=self.name):
+                    self.write_batch(self.buffer)
+                self.metrics.count('sink_records', len(self.buffer), sink=self.name)
+            else:
+                self.write_batch(self.buffer)
+            self.written += len(self.buffer)
+            self.buffer = []
+
+    def write_batch(self, records):
+        raise NotImplementedError
+
+    def close(self, complete=True):
+        """complete: the crawl saw the whole inventory (False after a failure)"""
+        self.flush()
+
+    def summary(self):
+        return f"{self.name}: {self.written} records"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(complete=exc_type is None)
+
+
+class JSONLSink(Sink):
+    """One JSON object per line"""
+
+    name = 'jsonl'
+
+    def __init__(self, path, batch_size=20, append=False):
+        """append: continue the file of an earlier slice of the same run"""
+        super().__init__(batch_size)
+        self.path = path
+        make_parent(path)
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write_batch(self, records):
+        for record in records:
+            self.file.write(json.dumps(record.to_dict(), ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self, complete=True):
+        super().close(complete)
+        self.file.close()
+
+    def summary(self):
+        return f"{self.name}: {self.written} records -> {self.path}"
+
+
+class CSVSink(JSONLSink):
+    """Delimited text in the sheet's column order (delimiter='\\t' for TSV)"""
+
+    name = 'csv'
+
+    def __init__(self, path, delimiter=',', batch_size=20, append=False):
+        super().__init__(path, batch_size, append)
+        self.writer = csv.writer(self.file, delimiter=delimiter, lineterminator='\n')
+        if self.file.tell() == 0:
+            self.writer.writerow(COLUMNS)
+
+    def write_batch(self, records):
+        self.writer.writerows(record.row() for record in records)
+        self.file.flush()
+
+
+class SQLiteSink(Sink):
+    """
+    Feed the persistent InventoryStore: batches are staged as they come and
+    the whole run is merged in one transaction at close (rolled back on
+    failure), which also records price changes and sold vehicles.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, batch_size=100, started_at=None):
+        """started_at: epoch time the run began, when it spans several slices"""
+        super().__init__(batch_size)
+        self.path = path
+        self.store = InventoryStore(path)
+        self.store.begin_run(started_at)
+        self.sold = 0
+
+    def write_batch(self, records):
+        self.store.stage(records)
+
+    def close(self, complete=True):
+        try:
+            self.flush()
+            self.sold = self.store.finish_run(complete)
+        except Exception:
+            self.store.abort_run()
+            raise
+        finally:
+            self.store.close()
+
+    def summary(self):
+        return f"{self.name}: {self.written} records, {self.sold} marked sold -> {self.path}"
+
+
+class SheetsSink(Sink):
+    """
+    Sync micro-batches to Google Sheets as they fill. Sold vehicles are
+    only deleted at close, from the keys of every row this run wrote, and
+    only if the crawl was complete.
+    """
+
+    name = 'sheets'
+
+    def __init__(self, uploader, batch_size=50, known_keys=(), dealers=None, per_dealer=False):
+        """
+        known_keys: rows an earlier slice of the same run already synced
+        dealers: the run's dealers; the cleanup only deletes their rows
+            (default: the dealers of the records written)
+        per_dealer: write each dealer to its own worksheet, named after it
+        """
+        super().__init__(batch_size)
+        self.uploader = uploader
+        self.keys = set(known_keys)
+        self.dealers = set(dealers or ())
+        self.per_dealer = per_dealer
+        self.failed = False
+
+    def write_batch(self, records):
+        if self.failed:
+            return
+        batches = {}
+        for record in records:
+            batches.setdefault(record.dealer, []).append(record)
+        self.dealers.update(batches)
+        if self.per_dealer:
+            ok = self.uploader.upload_worksheets(batches, delete_missing=False)
+        else:
+            ok = self.uploader.upload_vehicles(records, delete_missing=False)
+        if not ok:
+            # Stop writing (and never delete) once the sheet is unreachable
+            logger.error("❌ Sheets sink disabled after a failed batch")
+            self.failed = True
+            return
+        self.keys.update(record.key() for record in records)
+
+    def close(self, complete=True):
+        super().close(complete)
+        if self.failed or not complete or not self.keys:
+            logger.info("Sheets sink: skipping the sold-vehicle cleanup")
+            return
+        if self.per_dealer:
+            self.uploader.upload_worksheets({dealer: [] for dealer in sorted(self.dealers)},
+                                            delete_missing=True, keep_keys=self.keys, dealers=self.dealers)
+        else:
+            self.uploader.upload_vehicles([], delete_missing=True, keep_keys=self.keys, dealers=self.dealers)
+
+    def summary(self):
+        state = 'failed' if self.failed else f'{len(self.keys)} rows synced'
+        if self.per_dealer:
+            state += f' across {len(self.dealers)} worksheets'
+        return f"{self.name}: {self.written} records, {state}"
+
+
+class ThreadedSink:
+    """
+    Run a sink on its own thread behind a bounded queue: the crawl keeps
+    going while the sink writes, and blocks once `maxsize` records are waiting.
+    """
+
+    STOP = object()
+
+    def __init__(self, sink, maxsize=200):
+        self.sink = sink
+        self.name = sink.name
+        self.queue = queue.Queue(maxsize)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name=f'sink-{sink.name}', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            record = self.queue.get()
+            if record is self.STOP:
+                return
+            if self.error is None:
+                try:
+                    self.sink.write(record)
+                except Exception as e:
+                    logger.error(f"❌ {self.name} sink failed: {e}")
+                    self.error = e
+
+    def write(self, record):
+        self.queue.put(record)
+
+    def close(self, complete=True):
+        self.queue.put(self.STOP)
+        self.thread.join()
+        self.sink.close(complete=complete and self.error is None)
+
+    @property
+    def failed(self):
+        return self.error is not None or self.sink.failed
+
+    @property
+    def written(self):
+        return self.sink.written
+
+    def summary(self):
+        return self.sink.summary()
+
+
+def make_parent(path):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+
+def make_sink(spec, append=False, started_at=None):
+    """
+    Build a sink from 'kind:path', e.g. 'tsv:vehicles.tsv', 'csv:out.csv',
+    'jsonl:vehicles.jsonl' or 'sqlite:.cache/inventory.db' (the InventoryStore).
+    append / started_at: the run is resumed; extend its files and history.
+    """
+    kind, _, path = spec.partition(':')
+    kind = kind.strip().lower()
+    path = path.strip()
+    if kind == 'jsonl':
+        return JSONLSink(path or 'vehicles.jsonl', append=append)
+    if kind == 'csv':
+        return CSVSink(path or 'vehicles.csv', append=append)
+    if kind == 'tsv':
+        sink = CSVSink(path or 'vehicles.tsv', delimiter='\t', append=append)
+        sink.name = 'tsv'
+        return sink
+    if kind == 'sqlite':
+        return SQLiteSink(path or '.cache/inventory.db', started_at=started_at)
+    raise ValueError(f"Unknown sink {kind!r}; use jsonl, csv, tsv or sqlite")
+
+
+def run_pipeline(records, sinks):
+    """
+    Pull records from `records` and hand each one to every sink. Returns
+    the number of records. Sinks are always closed; they are told the crawl
+    was incomplete after an exception, or when `records` has a false
+    `complete` attribute once exhausted (see DealerStream).
+    """
+    count = 0
+    complete = False
+    try:
+        for record in records:
+            for sink in sinks:
+                sink.write(record)
+            count += 1
+        complete = getattr(records, 'complete', True)
+    finally:
+        for sink in sinks:
+            try:
+                sink.close(complete=complete)
+            except Exception as e:
+                logger.error(f"❌ Closing {sink.name} sink failed: {e}")
+    return count
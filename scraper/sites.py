@@ -0,0 +1,84 @@
+"""Registry of dealer site profiles"""
+import json
+from urllib.parse import urljoin
+
+
+class SiteProfile:
+    """
+    Everything site-specific about crawling one dealer: where the inventory
+    listings live, which links are vehicle pages, and the extraction rules
+    the generic heuristics need (brands to look for in titles, URL markers
+    for new/used).
+    """
+
+    def __init__(self, name, base_url, inventory_paths=('/inventory/new/', '/inventory/used/'),
+                 vehicle_path='/inventory/', exclude_suffixes=('/new/', '/used/', '/new', '/used'),
+                 exclude_substrings=('?page=',), brands=('Toyota',),
+                 condition_markers=None, requests_per_second=None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.inventory_paths = list(inventory_paths)
+        self.vehicle_path = vehicle_path
+        self.exclude_suffixes = tuple(exclude_suffixes)
+        self.exclude_substrings = tuple(exclude_substrings)
+        self.brands = list(brands)
+        self.condition_markers = condition_markers or {'new': '/new/', 'used': '/used/'}
+        self.requests_per_second = requests_per_second
+
+    @property
+    def inventory_urls(self):
+        return [urljoin(self.base_url + '/', path) for path in self.inventory_paths]
+
+    def vehicle_url(self, href):
+        """Absolute URL if `href` points at a vehicle detail page, else None"""
+        if self.vehicle_path not in href:
+            return None
+        full_url = urljoin(self.base_url, href)
+        if full_url.endswith(self.exclude_suffixes):
+            return None
+        if any(part in full_url for part in self.exclude_substrings):
+            return None
+        return full_url
+
+    def brand_in(self, title):
+        title_lower = title.lower()
+        for brand in self.brands:
+            if brand.lower() in title_lower:
+                return brand
+        return ''
+
+    def condition_of(self, url):
+        for condition, marker in self.condition_markers.items():
+            if marker in url:
+                return condition
+        return ''
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        return f'SiteProfile({self.name!r}, {self.base_url!r})'
+
+
+SITE_PROFILES = {}
+
+
+def register_site(profile):
+    SITE_PROFILES[profile.name] = profile
+    return profile
+
+
+def get_site(name):
+    try:
+        return SITE_PROFILES[name]
+    except KeyError:
+        raise KeyError(f"Unknown dealer site {name!r}; registered: {', '.join(sorted(SITE_PROFILES))}")
+
+
+def load_sites(path):
+    """Register the profiles in a JSON file (a list of SiteProfile kwargs)"""
+    with open(path, encoding='utf-8') as f:
+        return [register_site(SiteProfile(**entry)) for entry in json.load(f)]
+
+
+register_site(SiteProfile('reddeertoyota', 'https://www.reddeertoyota.com'))
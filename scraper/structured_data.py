@@ -0,0 +1,262 @@
+"""
+Structured-data fast path: read vehicle fields from JSON-LD Vehicle/Offer
+blocks and embedded inventory JSON before any HTML heuristics run.
+"""
+import json
+import re
+
+from .html_backend import iter_script_texts
+from .urls import listing_key
+
+VEHICLE_TYPES = {'vehicle', 'car', 'motorcycle', 'motorizedbicycle', 'busorcoach'}
+PRODUCT_TYPES = {'product', 'individualproduct', 'productmodel'}
+
+NON_DIGITS_RE = re.compile(r'[^\d.]')
+VIN_RE = re.compile(r'^[A-HJ-NPR-Z0-9]{17}$', re.I)
+
+# Embedded inventory blobs (e.g. __NEXT_DATA__, dealer platform state) use
+# their own key names; these are the common ones, lower-cased
+EMBEDDED_KEYS = {
+    'title': 'title', 'name': 'title',
+    'vin': 'vin',
+    'stock': 'id / stock-#', 'stocknumber': 'id / stock-#', 'stockno': 'id / stock-#', 'stock_number': 'id / stock-#',
+    'year': 'year', 'modelyear': 'year',
+    'make': 'brand', 'brand': 'brand',
+    'model': 'model',
+    'trim': 'trim / sub-model',
+    'bodystyle': 'body style', 'bodytype': 'body style',
+    'exteriorcolor': 'color', 'extcolor': 'color', 'color': 'color',
+    'engine': 'engine', 'enginedescription': 'engine',
+    'odometer': 'mileage', 'mileage': 'mileage', 'kilometers': 'mileage',
+    'msrp': 'vehicle MSRP',
+    'price': 'price', 'saleprice': 'price', 'internetprice': 'price', 'sellingprice': 'price',
+    'allinprice': 'vehicle all in price',
+    'condition': 'condition', 'type': 'condition',
+    'certified': 'certified pre-owned',
+    'imageurl': 'image link', 'image': 'image link', 'thumbnail': 'image link',
+    'description': 'description',
+}
+# Keys embedded records use for the listing ID that detail URLs end in
+ID_KEYS = {'id', 'vehicleid', 'listingid', 'inventoryid'}
+NUMERIC_FIELDS = {'price', 'vehicle MSRP', 'vehicle all in price', 'mileage'}
+
+
+def extract_structured(doc, url='', page_scan=None):
+    """
+    Vehicle fields found in structured data, keyed like the `data` dict.
+
+    Detail pages often embed "similar vehicles" next to the one on show, so
+    an embedded record is only taken when it carries this page's VIN (from
+    JSON-LD, else the page scan or URL), stock number or listing ID. Failing
+    that, a blob holding a single VIN is taken when the page shows no other;
+    one holding several is not.
+    `page_scan` is called (at most once) for the page scan, if needed.
+    """
+    fields = {}
+    for node in iter_json_ld_vehicles(doc):
+        for field, value in map_json_ld(node).items():
+            fields.setdefault(field, value)
+    records = [(record, map_embedded(record)) for record in iter_embedded_vehicles(doc)]
+    embedded = anchored_record(records, fields, url, page_scan) if records else None
+    for field, value in (embedded or {}).items():
+        fields.setdefault(field, value)
+    return {field: value for field, value in fields.items() if value}
+
+
+def anchored_record(records, fields, url, page_scan):
+    """The mapped embedded record describing this page's vehicle, if one does"""
+    vin = fields.get('vin')
+    if vin:
+        return next((embedded for _, embedded in records if embedded.get('vin') == vin), None)
+    
+    vins, stocks, ids = set(), set(), set()
+    key = listing_key(url) if url else ''
+    if key.startswith('vin:'):
+        vins.add(key[4:])
+    elif key.startswith('id:'):
+        ids.add(key[3:])
+    scan = page_scan() if page_scan else None
+    if scan:
+        vins.update([scan.vin.upper()] if scan.vin else [])
+        stocks.update([scan.stock.upper()] if scan.stock else [])
+    stocks |= ids
+    for record, embedded in records:
+        if embedded['vin'] in vins or embedded.get('id / stock-#', '').upper() in stocks:
+            return embedded
+        if ids and any(str(value) in ids for name, value in record.items()
+                       if name.lower() in ID_KEYS and isinstance(value, (str, int))):
+            return embedded
+    
+    # A lone VIN is this vehicle unless the page itself shows another one
+    if not vins and len({embedded['vin'] for _, embedded in records}) == 1:
+        return records[0][1]
+    return None
+
+
+def load_json(text):
+    try:
+        return json.loads(text, strict=False)
+    except (TypeError, ValueError):
+        return None
+
+
+def type_names(node):
+    types = node.get('@type', [])
+    if isinstance(types, str):
+        types = [types]
+    return {str(t).lower() for t in types}
+
+
+def iter_nodes(value):
+    """Every dict in a JSON-LD document, following @graph and lists"""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(reversed(value))
+        elif isinstance(value, dict):
+            yield value
+            if '@graph' in value:
+                stack.append(value['@graph'])
+
+
+def iter_json_ld_vehicles(doc):
+    """Vehicle nodes first, then generic products, from every ld+json block"""
+    vehicles, products = [], []
+    for text in iter_script_texts(doc, 'application/ld+json'):
+        for node in iter_nodes(load_json(text)):
+            types = type_names(node)
+            if types & VEHICLE_TYPES:
+                vehicles.append(node)
+            elif types & PRODUCT_TYPES:
+                products.append(node)
+    return vehicles + products
+
+
+def first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def name_of(value):
+    value = first(value)
+    if isinstance(value, dict):
+        return value.get('name') or value.get('@id') or ''
+    return value or ''
+
+
+def image_url(value):
+    value = first(value)
+    if isinstance(value, dict):
+        return value.get('url') or value.get('contentUrl') or ''
+    return value or ''
+
+
+def number(value):
+    """'$45,995.00' -> '45995'"""
+    value = first(value)
+    if isinstance(value, dict):
+        value = value.get('value', '')
+    digits = NON_DIGITS_RE.sub('', str(value or ''))
+    return digits.split('.')[0]
+
+
+def text(value):
+    value = first(value)
+    if isinstance(value, (dict, list)):
+        return ''
+    return ' '.join(str(value or '').split())
+
+
+def map_json_ld(node):
+    fields = {
+        'title': text(node.get('name')),
+        'vin': text(node.get('vehicleIdentificationNumber')).upper(),
+        'brand': text(name_of(node.get('brand') or node.get('manufacturer'))),
+        'model': text(name_of(node.get('model'))),
+        'trim / sub-model': text(node.get('vehicleConfiguration')),
+        'year': text(node.get('vehicleModelDate') or node.get('modelDate') or node.get('productionDate'))[:4],
+        'color': text(node.get('color')),
+        'engine': text(name_of(node.get('vehicleEngine')) or node.get('fuelType')),
+        'body style': text(node.get('bodyType')),
+        'image link': text(image_url(node.get('image'))),
+        'description': text(node.get('description')),
+        'mileage': number(node.get('mileageFromOdometer')),
+        'id / stock-#': text(node.get('sku') or node.get('productID')),
+        'condition': condition(node.get('itemCondition')),
+    }
+
+    offers = node.get('offers')
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    if isinstance(offers, dict):
+        fields['price'] = number(offers.get('price') or offers.get('lowPrice'))
+        if not fields['condition']:
+            fields['condition'] = condition(offers.get('itemCondition'))
+        specs = offers.get('priceSpecification') or []
+        for spec in specs if isinstance(specs, list) else [specs]:
+            if not isinstance(spec, dict):
+                continue
+            label = f"{spec.get('name', '')} {spec.get('priceType', '')}".lower()
+            if 'msrp' in label or 'listprice' in label:
+                fields['vehicle MSRP'] = number(spec.get('price'))
+
+    if VIN_RE.match(fields['id / stock-#']) and fields['id / stock-#'].upper() == fields['vin']:
+        fields['id / stock-#'] = ''
+    return fields
+
+
+def condition(value):
+    value = text(value).lower()
+    if 'new' in value:
+        return 'new'
+    if 'used' in value or 'preowned' in value or 'pre-owned' in value:
+        return 'used'
+    return ''
+
+
+def iter_embedded_vehicles(doc):
+    """Dicts with a 17-character 'vin' inside application/json blobs"""
+    for text_ in iter_script_texts(doc, 'application/json'):
+        if 'vin' not in text_.lower():
+            continue
+        for node in iter_nodes_deep(load_json(text_)):
+            vin = next((v for k, v in node.items() if k.lower() == 'vin'), None)
+            if isinstance(vin, str) and VIN_RE.match(vin):
+                yield node
+
+
+def iter_nodes_deep(value):
+    """Every dict anywhere in a JSON value"""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            yield value
+            stack.extend(reversed(list(value.values())))
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+
+
+def map_embedded(record):
+    fields = {}
+    for key, value in record.items():
+        field = EMBEDDED_KEYS.get(key.lower().replace('-', ''))
+        if not field or field in fields:
+            continue
+        if field == 'image link':
+            value = image_url(value)
+        elif field == 'condition':
+            value = condition(value)
+        elif field == 'certified pre-owned':
+            value = 'yes' if value is True or str(value).lower() in ('true', 'yes', '1') else ''
+        elif isinstance(value, dict):
+            value = name_of(value)
+        if field in NUMERIC_FIELDS:
+            value = number(value)
+        else:
+            value = text(value)
+        if field == 'vin':
+            value = value.upper()
+        if value:
+            fields[field] = value
+    return fields
@@ -0,0 +1,261 @@
+"""
+HTTP transport for the scraper: Transport.fetch() GETs a page through a
+keep-alive connection pool sized for the worker count, negotiates gzip
+(and brotli when the brotli package is installed), retries 429/5xx and
+network errors with exponential backoff honouring Retry-After, uses
+separate connect and read timeouts and stops reading a body past a size
+cap. It never raises for a failed fetch; it returns a FetchResult saying
+what went wrong.
+
+TimedAdapter is the pooled HTTPAdapter underneath; its new connections
+report their DNS lookup, TCP connect and TLS handshake times to a Metrics
+registry. Reused keep-alive connections report nothing, so the connection
+counter against the request count shows how well the pool is doing.
+"""
+import logging
+import random
+import socket
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util import make_headers
+from urllib3.util.connection import allowed_gai_family
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Pages that are gone for good: the vehicle sold between listing and fetch
+GONE_STATUSES = {404, 410}
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+class TimedConnection:
+    """Mixin for urllib3 connections; subclasses set `metrics`"""
+
+    metrics = None
+
+    def _new_conn(self):
+        host = self._dns_host
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            # Let urllib3 resolve again and raise its usual NameResolutionError
+            addresses = []
+        resolved = time.perf_counter()
+        self.metrics.observe('http_dns_seconds', resolved - started)
+        if len(addresses) == 1:
+            # Connect to the address just timed instead of resolving twice;
+            # SNI and the Host header still use self.host
+            self._dns_host = addresses[0][4][0]
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        self.metrics.observe('http_connect_seconds', time.perf_counter() - resolved)
+        self.metrics.count('http_connections')
+        return sock
+
+
+class TimedHTTPSConnection(TimedConnection, HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        # connect() is _new_conn() plus the handshake
+        elapsed = time.perf_counter() - started
+        self.metrics.observe('http_tls_seconds', max(0.0, elapsed - self.sock_connect_seconds))
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        sock = super()._new_conn()
+        self.sock_connect_seconds = time.perf_counter() - started
+        return sock
+
+
+class TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools time connection setup into `metrics`"""
+
+    def __init__(self, metrics, **kwargs):
+        attrs = {'metrics': metrics}
+        http = type('TimedHTTPConnection', (TimedConnection, HTTPConnection), attrs)
+        https = type('TimedHTTPSConnection', (TimedHTTPSConnection,), attrs)
+        self.pool_classes = {
+            'http': type('TimedHTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': http}),
+            'https': type('TimedHTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': https}),
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self.pool_classes
+
+
+class FetchResult:
+    """
+    Outcome of one Transport.fetch. `ok` results have the body in
+    `content`; failed ones have `reason` ('http_503', 'timeout',
+    'connection', 'too_large', 'error') and `error` (the detail).
+    """
+
+    __slots__ = ('url', 'status', 'headers', 'content', 'reason', 'error', 'attempts', 'elapsed')
+
+    def __init__(self, url, status=None, headers=None, content=None, reason=None, error=None,
+                 attempts=1, elapsed=0.0):
+        self.url = url
+        self.status = status
+        self.headers = headers or {}
+        self.content = content
+        self.reason = reason
+        self.error = error
+        self.attempts = attempts
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.reason is None
+
+    @property
+    def gone(self):
+        """The page no longer exists, as opposed to a failure worth retrying later"""
+        return self.status in GONE_STATUSES
+
+    def describe(self):
+        detail = f'{self.reason}: {self.error}' if self.error else self.reason
+        return f'{detail} after {self.attempts} attempt(s)'
+
+    def __repr__(self):
+        state = f'{len(self.content)} bytes' if self.ok else self.describe()
+        return f'FetchResult({self.url!r}, {self.status}, {state})'
+
+
+class Transport:
+    """
+    max_workers: threads fetching at once; the pool keeps one keep-alive
+        connection per worker and host
+    rate_limiter: HostRateLimiter every attempt (retries included) waits on
+    metrics: Metrics registry for timings and counters
+    connect_timeout / read_timeout: seconds to establish a connection / for
+        the server to send the next byte
+    retries: extra attempts after a 429, 5xx, timeout or dropped connection
+    backoff_base / backoff_max: full-jitter exponential backoff bounds; a
+        Retry-After header wins, capped at backoff_max
+    max_bytes: decoded body size after which the page is abandoned
+    """
+
+    def __init__(self, max_workers, rate_limiter, metrics, connect_timeout=5.0, read_timeout=20.0,
+                 retries=3, backoff_base=0.5, backoff_max=30.0, max_bytes=5 * 1024 * 1024):
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+        adapter = TimedAdapter(metrics, pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            # gzip and deflate, plus br when urllib3 can decode it
+            'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding'],
+            'Connection': 'keep-alive',
+        })
+
+    def close(self):
+        self.session.close()
+
+    def fetch(self, url, headers=None):
+        """GET `url`; a FetchResult whatever happens"""
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            result, retry_after = self.attempt(url, headers)
+            result.attempts = attempt
+            if result.ok or not self.retryable(result) or attempt > self.retries:
+                break
+            delay = self.retry_delay(attempt - 1, retry_after)
+            self.metrics.count('http_retries', reason=result.reason)
+            logger.warning(f"{url}: {result.reason}, retrying in {delay:.1f}s (attempt {attempt}/{self.retries + 1})")
+            time.sleep(delay)
+        result.elapsed = time.perf_counter() - started
+        if not result.ok:
+            self.metrics.count('fetch_failures', reason=result.reason)
+        return result
+
+    def attempt(self, url, headers):
+        """One request: (FetchResult, Retry-After header or None)"""
+        self.metrics.observe('rate_limit_wait_seconds', self.rate_limiter.acquire(url))
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+        except requests.Timeout as e:
+            return FetchResult(url, reason='timeout', error=str(e)), None
+        except requests.ConnectionError as e:
+            return FetchResult(url, reason='connection', error=str(e)), None
+        except requests.RequestException as e:
+            return FetchResult(url, reason='error', error=str(e)), None
+
+        with response:
+            # Streamed, so elapsed stops at the response headers: time to
+            # first byte, including connection setup when the pool had none free
+            self.metrics.observe('http_ttfb_seconds', response.elapsed.total_seconds())
+            self.metrics.count('http_responses', status=response.status_code)
+            status = response.status_code
+            if status >= 400:
+                return (FetchResult(url, status, response.headers, reason=f'http_{status}'),
+                        response.headers.get('Retry-After'))
+            try:
+                with self.metrics.timer('http_download_seconds'):
+                    content = self.read_body(response)
+            except requests.Timeout as e:
+                return FetchResult(url, status, reason='timeout', error=str(e)), None
+            except requests.RequestException as e:
+                return FetchResult(url, status, reason='connection', error=str(e)), None
+            if content is None:
+                return FetchResult(url, status, reason='too_large', error=f'over {self.max_bytes} bytes'), None
+            self.metrics.count('http_bytes', len(content))
+            return FetchResult(url, status, response.headers, content), None
+
+    def read_body(self, response):
+        """The decoded body, or None once it grows past max_bytes"""
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            return None
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > self.max_bytes:
+                return None
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def retryable(self, result):
+        return result.reason in ('timeout', 'connection') or result.status in RETRY_STATUSES
+
+    def retry_delay(self, attempt, retry_after=None):
+        """Server-requested delay if any, else full-jitter exponential backoff"""
+        seconds = retry_after_seconds(retry_after)
+        if seconds is not None:
+            return min(self.backoff_max, seconds)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def retry_after_seconds(value):
+    """Seconds a Retry-After header asks for (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
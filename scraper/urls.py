@@ -0,0 +1,114 @@
+"""Canonical vehicle URLs and the per-run index that keeps one URL per vehicle"""
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track the visitor, never select a page
+TRACKING_PARAMS = {'gclid', 'gbraid', 'wbraid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+                   '_ga', '_gl', '_hsenc', '_hsmi', 'ref', 'referrer'}
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# 17 characters, no I/O/Q; the lookarounds keep it out of longer tokens
+VIN_RE = re.compile(r'(?<![A-Za-z0-9])([A-HJ-NPR-Za-hj-npr-z0-9]{17})(?![A-Za-z0-9])')
+# Trailing number of a slug ("...-camry-le-id10472391"), long enough not to be a year
+SLUG_ID_RE = re.compile(r'(?:^|[-_/.])(?:id)?(\d{5,})(?:\.html?)?/?$', re.I)
+ID_PARAMS = ('vehicle_id', 'vehicleid', 'listing_id', 'listingid', 'vid', 'id')
+
+
+def is_tracking(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url):
+    """
+    `url` with a lowercase scheme and host, no default port, no fragment,
+    no tracking parameters and the remaining query sorted. The path,
+    trailing slash included, is left as the site wrote it.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not is_tracking(key))
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+def listing_key(url):
+    """
+    Identity of the vehicle behind a canonical URL: 'vin:...' or 'id:...'
+    when the slug or query carries one, else the URL without its trailing
+    slash. Two URLs with the same key are the same vehicle page.
+    """
+    parts = urlsplit(url)
+    match = VIN_RE.search(parts.path)
+    if match and not match.group(1).isdigit() and not match.group(1).isalpha():
+        return f'vin:{match.group(1).upper()}'
+    query = dict((key.lower(), value) for key, value in parse_qsl(parts.query))
+    for name in ID_PARAMS:
+        if query.get(name):
+            return f'id:{query[name]}'
+    segment = parts.path.rstrip('/').rsplit('/', 1)[-1]
+    match = SLUG_ID_RE.search(segment)
+    if match:
+        return f'id:{match.group(1)}'
+    return urlunsplit(parts._replace(path=parts.path.rstrip('/') or '/'))
+
+
+class LinkIndex:
+    """
+    Vehicle links seen during one run, keyed by listing_key.
+
+    canonical() is what link extraction returns for every vehicle href, so
+    tracking parameters and fragments never reach the fetch queue;
+    dedup() then keeps one URL per vehicle before the pages are queued.
+    The counts say how many detail fetches that saved over fetching every
+    distinct href.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.raw = set()
+        self.keys = {}
+        self.stats = {'urls': 0, 'vehicles': 0, 'variants': 0, 'same_listing': 0}
+
+    def canonical(self, url):
+        """Record a vehicle href (absolute) and return its canonical URL"""
+        with self.lock:
+            self.raw.add(url)
+        return canonical_url(url)
+
+    def dedup(self, urls):
+        """
+        One URL per vehicle from `urls`: the first in sorted order, so a
+        vehicle keeps the same URL (and cache/fingerprint entries) across
+        runs. Returns the kept URLs as a set.
+        """
+        kept = set()
+        with self.lock:
+            for url in sorted(urls):
+                key = listing_key(url)
+                if self.keys.setdefault(key, url) == url:
+                    kept.add(url)
+                else:
+                    self.stats['same_listing'] += 1
+            # Distinct hrefs the canonical form already folded together
+            canonical = {canonical_url(url) for url in self.raw}
+            self.stats['variants'] = len(self.raw) - len(canonical)
+            self.stats['urls'] = len(self.raw)
+            self.stats['vehicles'] = len(self.keys)
+        return kept
+
+    @property
+    def saved(self):
+        """Detail fetches avoided this run"""
+        return self.stats['variants'] + self.stats['same_listing']
+
+    def summary(self):
+        s = self.stats
+        return (f"Link dedup: {s['urls']} vehicle hrefs -> {s['vehicles']} vehicles, {self.saved} fetches saved "
+                f"({s['variants']} URL variants, {s['same_listing']} same listing ID/VIN)")
@@ -0,0 +1,139 @@
+"""
+The vehicle record shared by the scraper, the sinks and the uploaders.
+
+Extraction works on a plain `data` dict keyed by sheet column; each finished
+record becomes a Vehicle: one slotted object with typed numbers and a
+normalized VIN, in the single column order every output uses.
+"""
+import re
+from operator import attrgetter
+
+# (attribute, sheet column) in output order
+SCHEMA = (
+    ('title', 'title'),
+    ('stock', 'id / stock-#'),
+    ('price', 'price'),
+    ('condition', 'condition'),
+    ('feed_label', 'feed label'),
+    ('body_style', 'body style'),
+    ('brand', 'brand'),
+    ('certified', 'certified pre-owned'),
+    ('color', 'color'),
+    ('description', 'description'),
+    ('engine', 'engine'),
+    ('image_link', 'image link'),
+    ('link', 'link'),
+    ('mileage', 'mileage'),
+    ('model', 'model'),
+    ('trim', 'trim / sub-model'),
+    ('msrp', 'vehicle MSRP'),
+    ('all_in_price', 'vehicle all in price'),
+    ('option', 'vehicle option'),
+    ('vin', 'vin'),
+    ('year', 'year'),
+    ('dealer', 'dealer'),
+)
+
+FIELDS = tuple(field for field, _ in SCHEMA)
+COLUMNS = tuple(column for _, column in SCHEMA)
+FIELD_OF = {column: field for field, column in SCHEMA}
+INT_FIELDS = frozenset(('price', 'mileage', 'msrp', 'all_in_price'))
+
+NUMBER_RE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+VIN_JUNK_RE = re.compile(r'[^A-Z0-9]')
+
+
+def to_int(value):
+    """'$45,995.00' / '12,300 km' / 45995.0 -> 45995; None when there's no number"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = NUMBER_RE.search(str(value))
+    if not match:
+        return None
+    return int(float(match.group().replace(',', '')))
+
+
+def normalize_vin(value):
+    """Upper-case, without the spaces/dashes some sites put in"""
+    return VIN_JUNK_RE.sub('', str(value or '').upper())
+
+
+class Vehicle:
+    """
+    One scraped vehicle. Text fields are str ('' when unknown); price,
+    mileage, msrp and all_in_price are int or None.
+
+    Also readable by column name (vehicle['id / stock-#'], .get()), so code
+    written against the old dicts keeps working.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, **fields):
+        for field in FIELDS:
+            value = fields.pop(field, None)
+            if field in INT_FIELDS:
+                value = to_int(value)
+            elif field == 'vin':
+                value = normalize_vin(value)
+            else:
+                value = '' if value is None else str(value).strip()
+            setattr(self, field, value)
+        if fields:
+            raise TypeError(f"Unknown vehicle fields: {', '.join(fields)}")
+
+    @classmethod
+    def from_dict(cls, data):
+        """From a `data` dict keyed by sheet column (unknown keys are ignored)"""
+        return cls(**{FIELD_OF[column]: value for column, value in data.items() if column in FIELD_OF})
+
+    def to_dict(self):
+        """Column-keyed dict, e.g. for JSON"""
+        return dict(zip(COLUMNS, self.values))
+
+    # attrgetter builds the tuple in C, without a Python-level loop
+    values = property(attrgetter(*FIELDS), doc="Field values in column order, native types")
+
+    def row(self):
+        """Field values in column order as sheet strings ('' for missing numbers)"""
+        return ['' if value is None else str(value) for value in self.values]
+
+    def key(self):
+        """VIN, else stock number, else link; same format as sheet_sync.row_key"""
+        if self.vin:
+            return f'vin:{self.vin}'
+        if self.stock:
+            return f'id / stock-#:{self.stock}'
+        if self.link:
+            return f'link:{self.link}'
+        return None
+
+    def __getitem__(self, column):
+        try:
+            return getattr(self, FIELD_OF[column])
+        except KeyError:
+            raise KeyError(column) from None
+
+    def get(self, column, default=None):
+        field = FIELD_OF.get(column)
+        return getattr(self, field) if field else default
+
+    def __eq__(self, other):
+        if not isinstance(other, Vehicle):
+            return NotImplemented
+        return self.values == other.values
+
+    def __repr__(self):
+        return f'Vehicle({self.title!r}, vin={self.vin!r}, price={self.price!r})'
+
+
+def to_columns(vehicles):
+    """Columnar view: {column: [values...]} with native types, for bulk loaders"""
+    columns = list(zip(*(vehicle.values for vehicle in vehicles)))
+    if not columns:
+        return {column: [] for column in COLUMNS}
+    return {column: list(values) for column, values in zip(COLUMNS, columns)}
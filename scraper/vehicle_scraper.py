@@ -1,41 +1,171 @@
-import requests
-from bs4 import BeautifulSoup
-import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice
 from urllib.parse import urljoin
 import re
 import json
 import logging
 import os
+import hashlib
+import threading
+import time
+
+from .rate_limiter import HostRateLimiter
+from .http_cache import HTTPCache
+from .fingerprints import FingerprintStore
+from .frontier import Frontier
+from .metrics import Metrics
+from .extractor import scan_page, select_price
+from .html_backend import parse_html, resolve_backend, iter_hrefs, to_html
+from .structured_data import extract_structured
+from .listing_cards import find_cards, card_image
+from .paginator import Paginator
+from .sites import SiteProfile, get_site
+from .transport import Transport
+from .urls import LinkIndex
+from .vehicle import COLUMNS, Vehicle
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
+# Bump whenever extraction changes so stored fingerprints get re-parsed
+EXTRACTOR_VERSION = 5
+
+YEAR_RE = re.compile(r'\b(20\d{2})\b')
+
+# Fields that need the page walk; it is skipped when structured data
+# already filled all of them
+SCAN_FIELDS = ('title', 'price', 'id / stock-#', 'vin', 'mileage')
+
+# Listing cards rarely have a heading level to themselves
+CARD_HEADINGS = ('h1', 'h2', 'h3', 'h4', 'h5')
+
+
+def empty_record(url, dealer=''):
+    """A blank vehicle `data` dict with every column"""
+    data = dict.fromkeys(COLUMNS, '')
+    data['link'] = url
+    data['dealer'] = dealer
+    return data
+
 class VehicleScraper:
-    def __init__(self):
-        self.base_url = "https://www.reddeertoyota.com"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        self.debug_mode = True
+    def __init__(self, site=None, max_workers=4, requests_per_second=1.0, burst=1, cache_dir=None,
+                 fingerprint_path=None, parser='html.parser', listing_only=False,
+                 detail_refresh_days=None, paginate=True, frontier_path=None, run_id=None,
+                 deadline=None, quiet=False, connect_timeout=5.0, read_timeout=20.0, retries=3,
+                 max_page_bytes=5 * 1024 * 1024):
+        """
+        site: SiteProfile (or registered name) of the dealer to crawl,
+            defaults to reddeertoyota
+        max_workers: number of pages fetched concurrently
+        requests_per_second / burst: politeness budget applied per host,
+            shared by all workers
+        cache_dir: enables the conditional-GET response cache in that directory
+        fingerprint_path: enables incremental mode, skipping extraction for
+            vehicle pages whose content hash hasn't changed
+        parser: HTML backend, 'html.parser', 'lxml' or 'selectolax'
+        listing_only: build records from inventory grid cards and fetch a
+            detail page only when the card lacks title, price or VIN/stock
+        detail_refresh_days: in listing_only mode, also re-fetch detail pages
+            older than this (needs fingerprint_path to remember fetch times)
+        paginate: treat each inventory URL as the first page of a listing and
+            discover the rest; False scans exactly the URLs given
+        frontier_path / run_id: record per-URL progress in that Frontier
+            under the run ID, so an interrupted run resumes where it stopped
+        deadline: time.time() after which no new vehicle page is started
+        quiet: skip the per-vehicle debug logging and HTML dumps; stage
+            timings and counters still go to self.metrics
+        connect_timeout / read_timeout / retries / max_page_bytes: the HTTP
+            transport's limits (see transport.Transport); pages that still
+            fail are kept in self.failures as FetchResults
+        """
+        if not isinstance(site, SiteProfile):
+            site = get_site(site or 'reddeertoyota')
+        self.site = site
+        self.base_url = site.base_url
+        self.max_workers = max(1, int(max_workers))
+        self.parser = resolve_backend(parser)
+        self.rate_limiter = HostRateLimiter(site.requests_per_second or requests_per_second, burst)
+        self.metrics = Metrics()
+        self.transport = Transport(self.max_workers, self.rate_limiter, self.metrics,
+                                   connect_timeout=connect_timeout, read_timeout=read_timeout,
+                                   retries=retries, max_bytes=max_page_bytes)
+        self.session = self.transport.session
+        self.failures = {}
+        self.failures_lock = threading.Lock()
+        self.cache = HTTPCache(cache_dir) if cache_dir else None
+        self.fingerprints = FingerprintStore(fingerprint_path, EXTRACTOR_VERSION) if fingerprint_path else None
+        self.links = LinkIndex()
+        self.removed_urls = []
+        self.complete = False
+        self.paginate = paginate
+        self.listing_only = listing_only
+        self.detail_refresh = detail_refresh_days * 86400 if detail_refresh_days else None
+        self.listing_cards = {}
+        self.details_skipped = 0
+        self.cards_lock = threading.Lock()
+        if self.detail_refresh and not self.fingerprints:
+            logger.warning("detail_refresh_days needs fingerprint_path; detail pages won't be refreshed")
+        self.frontier = Frontier(frontier_path) if frontier_path and run_id else None
+        self.run_id = run_id
+        self.deadline = deadline
+        self.verbose = not quiet
+        self.debug_mode = not quiet
         self.debug_count = 0
+        self.debug_lock = threading.Lock()
     
-    def get_page(self, url):
-        try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
-        except Exception as e:
-            logger.error(f"Error: {e}")
+    def fetch(self, url, quiet_gone=False):
+        """
+        FetchResult for `url`, revalidated against the cache when one is
+        configured. quiet_gone: a 404/410 is expected (a listing page past
+        the end), so it's logged at info level; it's still recorded.
+        """
+        entry = self.cache.lookup(url) if self.cache else None
+        headers = self.cache.conditional_headers(entry) if self.cache else None
+        result = self.transport.fetch(url, headers)
+        if result.status == 304 and entry:
+            content = self.cache.load_body(url)
+            if content is not None:
+                result.content = content
+                return result
+            # Body went missing from disk; fetch it again unconditionally
+            entry = None
+            result = self.transport.fetch(url)
+        if not result.ok:
+            if quiet_gone and result.gone:
+                logger.info(f"  {url}: {result.describe()}")
+            else:
+                logger.error(f"❌ {url}: {result.describe()}")
+            with self.failures_lock:
+                self.failures[url] = result
+        elif self.cache:
+            self.cache.store(url, result, entry)
+        return result
+    
+    def fetch_content(self, url, quiet_gone=False):
+        """Raw page body, or None if the fetch failed (the reason is in self.failures)"""
+        result = self.fetch(url, quiet_gone)
+        return result.content if result.ok else None
+    
+    def get_page(self, url, quiet_gone=False):
+        content = self.fetch_content(url, quiet_gone)
+        if content is None:
             return None
+        with self.metrics.timer('parse_seconds', page='listing'):
+            return parse_html(content, self.parser)
     
     def save_debug_html(self, soup, filename):
         """Save HTML for debugging"""
-        if self.debug_mode and self.debug_count < 3:
+        if not self.debug_mode:
+            return
+        with self.debug_lock:
+            if self.debug_count >= 3:
+                return
             try:
                 os.makedirs('debug_output', exist_ok=True)
+                filename = filename.format(n=self.debug_count + 1)
                 with open(f'debug_output/{filename}', 'w', encoding='utf-8') as f:
-                    f.write(soup.prettify())
+                    f.write(to_html(soup))
                 logger.info(f"  💾 Saved HTML to debug_output/{filename}")
                 self.debug_count += 1
             except:
@@ -48,19 +178,19 @@ class VehicleScraper:
         links = set()
         all_hrefs = []
         
-        for a in soup.find_all('a', href=True):
-            href = a['href']
+        for href in iter_hrefs(soup):
             all_hrefs.append(href)
             
-            if '/inventory/' in href:
-                full_url = urljoin(self.base_url, href)
-                if not any(full_url.endswith(x) for x in ['/new/', '/used/', '/new', '/used']):
-                    if '?page=' not in full_url:
-                        links.add(full_url)
+            full_url = self.vehicle_url(href)
+            if full_url:
+                links.add(full_url)
+        
+        if not self.verbose:
+            return list(links)
         
         # Debug output
         logger.info(f"  DEBUG: Found {len(all_hrefs)} total links")
-        logger.info(f"  DEBUG: {len([h for h in all_hrefs if '/inventory/' in h])} contain /inventory/")
+        logger.info(f"  DEBUG: {len([h for h in all_hrefs if self.site.vehicle_path in h])} contain {self.site.vehicle_path}")
         logger.info(f"  DEBUG: {len(links)} vehicle pages identified")
         
         if len(links) == 0:
@@ -70,101 +200,124 @@ class VehicleScraper:
         
         return list(links)
     
+    def vehicle_url(self, href):
+        """Canonical URL if `href` points at a vehicle detail page, else None"""
+        url = self.site.vehicle_url(href)
+        return self.links.canonical(url) if url else None
+    
+    def extract_cards(self, soup):
+        """Vehicle records built from the cards of an inventory grid page"""
+        records = {}
+        started = time.perf_counter()
+        for url, (card, link_text) in find_cards(soup, self.vehicle_url).items():
+            data = empty_record(url, self.site.name)
+            if card is not None:
+                scan = scan_page(card, CARD_HEADINGS)
+                if not scan.title:
+                    scan.title = link_text
+                image = card_image(card)
+                if image:
+                    data['image link'] = urljoin(url, image)
+            else:
+                scan = None
+                data['title'] = link_text
+            self.apply_heuristics(scan, url, data)
+            records[url] = data
+        self.metrics.observe('extract_seconds', time.perf_counter() - started, group='cards')
+        return records
+    
+    def needs_detail(self, url, record):
+        """Whether a listing-card record has to be completed from its detail page"""
+        if not record['title'] or not record['price']:
+            return True
+        if not record['vin'] and not record['id / stock-#']:
+            return True
+        if self.detail_refresh and self.fingerprints:
+            _, age = self.fingerprints.previous(url)
+            if age is None or age > self.detail_refresh:
+                return True
+        return False
+    
+    def vehicle_from_listing(self, url):
+        """listing_only mode: the card record, topped up from a detail page if needed"""
+        record = self.listing_cards.get(url)
+        if record is not None:
+            if self.fingerprints:
+                # Fields only the detail page has (color, engine...) carry over
+                previous, _ = self.fingerprints.previous(url)
+                for field, value in (previous or {}).items():
+                    if value and not record.get(field):
+                        record[field] = value
+            if not self.needs_detail(url, record):
+                with self.cards_lock:
+                    self.details_skipped += 1
+                return record
+        
+        detail = self.scrape_vehicle(url)
+        if detail is None:
+            return record
+        for field, value in (record or {}).items():
+            if value and not detail.get(field):
+                detail[field] = value
+        return detail
+    
     def scrape_vehicle(self, url):
-        logger.info(f"\n{'='*120}")
-        logger.info(f"SCRAPING: {url}")
+        if self.verbose:
+            logger.info(f"\n{'='*120}")
+            logger.info(f"SCRAPING: {url}")
         
-        soup = self.get_page(url)
-        if not soup:
+        content = self.fetch_content(url)
+        if content is None:
             return None
         
-        # Save first 3 vehicle pages for debugging
-        self.save_debug_html(soup, f'vehicle_page_{self.debug_count + 1}.html')
-        
-        data = {
-            'title': '', 'id / stock-#': '', 'price': '', 'condition': '',
-            'feed label': '', 'body style': '', 'brand': '', 'certified pre-owned': '',
-            'color': '', 'description': '', 'engine': '', 'image link': '',
-            'link': url, 'mileage': '', 'model': '', 'trim / sub-model': '',
-            'vehicle MSRP': '', 'vehicle all in price': '', 'vehicle option': '',
-            'vin': '', 'year': ''
-        }
-        
-        page_text = soup.get_text()
-        
-        # Extract title
-        h1 = soup.find('h1')
-        if h1:
-            data['title'] = ' '.join(h1.get_text().strip().split())
-            logger.info(f"TITLE: {data['title']}")
+        digest = hashlib.sha256(content).hexdigest()
+        if self.fingerprints:
+            previous = self.fingerprints.lookup(url, digest)
+            if previous is not None:
+                if self.verbose:
+                    logger.info("  Unchanged since last run, reusing previous record")
+                return previous
         
-        # Parse basic info from title
-        if data['title']:
-            year_match = re.search(r'\b(20\d{2})\b', data['title'])
-            if year_match:
-                data['year'] = year_match.group(1)
-            
-            title_lower = data['title'].lower()
-            if 'toyota' in title_lower:
-                data['brand'] = 'Toyota'
-            
-            # Simple model extraction
-            parts = data['title'].split()
-            if len(parts) > 2:
-                data['model'] = parts[2] if len(parts) > 2 else ''
-                data['trim / sub-model'] = ' '.join(parts[3:]) if len(parts) > 3 else ''
+        with self.metrics.timer('parse_seconds', page='vehicle'):
+            soup = parse_html(content, self.parser)
+        with self.metrics.timer('extract_seconds', group='total'):
+            data = self.extract_vehicle(soup, url)
+        if self.fingerprints:
+            self.fingerprints.update(url, digest, data)
+        return data
+    
+    def extract_vehicle(self, soup, url):
+        """Build the vehicle `data` dict from a parsed detail page"""
+        # Save first 3 vehicle pages for debugging
+        self.save_debug_html(soup, 'vehicle_page_{n}.html')
         
-        # Condition from URL
-        if '/new/' in url:
-            data['condition'] = 'new'
-        elif '/used/' in url:
-            data['condition'] = 'used'
-        
-        # Find ALL text containing prices
-        logger.info(f"\nPRICE DEBUGGING:")
-        logger.info(f"  Looking for all $ signs on page...")
-        
-        price_texts = []
-        for elem in soup.find_all(text=re.compile(r'\$')):
-            parent = elem.parent
-            text = ' '.join(parent.get_text().strip().split())
-            if text and len(text) < 200:
-                price_texts.append(text)
-        
-        logger.info(f"  Found {len(price_texts)} elements with $")
-        for i, pt in enumerate(price_texts[:20], 1):
-            logger.info(f"    {i}. {pt}")
-        
-        # Try to extract price
-        for pt in price_texts:
-            if 'msrp' not in pt.lower() and '$' in pt:
-                nums = re.findall(r'\$?\s*([\d,]+)', pt.replace(',', ''))
-                for num in nums:
-                    if len(num) >= 5:
-                        data['price'] = num
-                        logger.info(f"\n  ✓ SELECTED PRICE: ${num} from: {pt}")
-                        break
-                if data['price']:
-                    break
+        data = empty_record(url, self.site.name)
         
-        if not data['price']:
-            logger.info(f"  ⚠️ NO PRICE FOUND!")
+        # One walk collects title, $ candidates, stock, VIN and mileage; done
+        # at most once, when embedded JSON or the heuristics need it
+        scans = []
+        def page_scan():
+            if not scans:
+                with self.metrics.timer('extract_seconds', group='page_scan'):
+                    scans.append(scan_page(soup))
+            return scans[0]
         
-        # Simple text searches for other fields
-        # Stock
-        stock_match = re.search(r'(?:Stock|Stk)\s*#?\s*:?\s*([A-Z0-9-]+)', page_text, re.I)
-        if stock_match:
-            data['id / stock-#'] = stock_match.group(1)
+        # Structured data (JSON-LD / embedded inventory JSON) first
+        with self.metrics.timer('extract_seconds', group='structured'):
+            structured = extract_structured(soup, url, page_scan)
+        data.update(structured)
+        if structured and self.verbose:
+            logger.info(f"STRUCTURED DATA: {len(structured)} fields ({', '.join(structured)})")
         
-        # VIN  
-        vin_match = re.search(r'\b([A-HJ-NPR-Z0-9]{17})\b', page_text)
-        if vin_match:
-            data['vin'] = vin_match.group(1).upper()
+        # HTML heuristics only for what structured data left blank
+        scan = None
+        if not all(data[field] for field in SCAN_FIELDS):
+            scan = page_scan()
+        with self.metrics.timer('extract_seconds', group='heuristics'):
+            self.apply_heuristics(scan, url, data)
         
-        # Mileage
-        km_match = re.search(r'([\d,]+)\s*km', page_text, re.I)
-        if km_match:
-            data['mileage'] = km_match.group(1).replace(',', '')
+        if not self.verbose:
+            return data
         
         # Summary
         logger.info(f"\nSUMMARY:")
@@ -178,26 +331,170 @@ class VehicleScraper:
         
         return data
     
+    def apply_heuristics(self, scan, url, data):
+        """Fill missing fields from the page scan (if any), title and URL"""
+        # Extract title
+        if scan and not data['title'] and scan.title:
+            data['title'] = scan.title
+            if self.verbose:
+                logger.info(f"TITLE: {data['title']}")
+        
+        # Parse basic info from title
+        if data['title']:
+            year_match = YEAR_RE.search(data['title'])
+            if year_match and not data['year']:
+                data['year'] = year_match.group(1)
+            
+            if not data['brand']:
+                data['brand'] = self.site.brand_in(data['title'])
+            
+            # Simple model extraction
+            parts = data['title'].split()
+            if len(parts) > 2 and not data['model']:
+                data['model'] = parts[2]
+                if not data['trim / sub-model']:
+                    data['trim / sub-model'] = ' '.join(parts[3:])
+        
+        # Condition from URL
+        if not data['condition']:
+            data['condition'] = self.site.condition_of(url)
+        
+        if not scan:
+            return
+        
+        if not data['price']:
+            # Find ALL text containing prices
+            price_texts = scan.price_texts
+            data['price'], source = select_price(price_texts)
+            if self.verbose:
+                logger.info(f"\nPRICE DEBUGGING:")
+                logger.info(f"  Found {len(price_texts)} elements with $")
+                for i, pt in enumerate(price_texts[:20], 1):
+                    logger.info(f"    {i}. {pt}")
+                if data['price']:
+                    logger.info(f"\n  ✓ SELECTED PRICE: ${data['price']} from: {source}")
+                else:
+                    logger.info(f"  ⚠️ NO PRICE FOUND!")
+        
+        data['id / stock-#'] = data['id / stock-#'] or scan.stock
+        data['vin'] = data['vin'] or scan.vin
+        data['mileage'] = data['mileage'] or scan.mileage
+    
+    def scan_listing(self, url):
+        """Fetch one inventory page and return the vehicle links on it"""
+        soup = self.get_page(url)
+        if soup is None:
+            return None
+        links = self.process_listing(soup)
+        logger.info(f"Scanned: {url}\n  → Found {len(links)} vehicles\n")
+        return links
+    
+    def process_listing(self, soup):
+        """Vehicle links of a parsed inventory page, keeping its cards in listing_only mode"""
+        links = self.extract_links(soup)
+        if self.listing_only:
+            cards = self.extract_cards(soup)
+            with self.cards_lock:
+                for link, record in cards.items():
+                    self.listing_cards.setdefault(link, record)
+        return links
+
+    
+    def map_concurrent(self, func, items):
+        """Run func over items on the worker pool, results in input order"""
+        items = list(items)
+        if self.max_workers == 1 or len(items) < 2:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(func, items))
+    
+    def imap_concurrent(self, func, items, window=None):
+        """
+        Lazy map_concurrent: yields results in input order while keeping at
+        most `window` calls in flight, so a slow consumer pauses the workers
+        instead of letting finished results pile up.
+        """
+        if self.max_workers == 1:
+            for item in items:
+                yield func(item)
+            return
+        window = window or self.max_workers * 2
+        items = iter(items)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            pending = deque(executor.submit(func, item) for item in islice(items, window))
+            while pending:
+                result = pending.popleft().result()
+                for item in islice(items, 1):
+                    pending.append(executor.submit(func, item))
+                yield result
+        finally:
+            # Stopped early (consumer closed us or raised): drop queued work
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def scrape_site(self):
+        """Crawl every inventory listing of the configured dealer site"""
+        return self.scrape_inventory_pages(self.site.inventory_urls)
+    
+    def iter_site(self):
+        """Stream the vehicles of the configured dealer site as they're extracted"""
+        return self.iter_vehicles(self.site.inventory_urls)
+    
     def scrape_inventory_pages(self, urls):
-        all_vehicles = []
+        return list(self.iter_vehicles(urls))
+    
+    def collect_links(self, urls):
+        """Vehicle URLs of every listing, and whether every listing page loaded"""
         all_links = set()
         
         logger.info(f"\n{'='*120}")
         logger.info(f"COLLECTING VEHICLE LINKS")
         logger.info(f"{'='*120}\n")
         
-        for url in urls:
-            logger.info(f"Scanning: {url}")
-            soup = self.get_page(url)
-            if soup:
-                links = self.extract_links(soup)
-                all_links.update(links)
-                logger.info(f"  → Found {len(links)} vehicles\n")
-            time.sleep(1)
+        if self.paginate:
+            # One listing at a time: each crawl already fetches its pages in
+            # windows of max_workers, which is what the connection pool holds
+            results = [Paginator(self).crawl(url) for url in urls]
+        else:
+            results = [(links or [], links is not None)
+                       for links in self.map_concurrent(self.scan_listing, urls)]
+        
+        listings_complete = True
+        for links, complete in results:
+            all_links.update(links)
+            listings_complete = listings_complete and complete
+        # One URL per vehicle before anything is queued for fetching
+        all_links = self.links.dedup(all_links)
         
         logger.info(f"{'='*120}")
         logger.info(f"TOTAL VEHICLES: {len(all_links)}")
+        logger.info(self.links.summary())
         logger.info(f"{'='*120}")
+        return all_links, listings_complete
+    
+    def iter_vehicles(self, urls):
+        """
+        Generator over the Vehicles of the given listing pages, each
+        yielded as soon as it's extracted (in URL order). self.complete is
+        True once every listing loaded and every vehicle was yielded.
+        
+        With a frontier, the listing stage and every parsed record are
+        saved under the run ID: a resumed run skips the listings, first
+        re-yields records parsed but never confirmed uploaded, then scrapes
+        only the URLs still pending. Past the deadline no new page is
+        started and the generator ends with self.complete False.
+        """
+        self.complete = False
+        known = self.frontier.links(self.run_id, self.site.name) if self.frontier else None
+        if known is None:
+            all_links, listings_complete = self.collect_links(urls)
+            if self.frontier:
+                self.frontier.add_links(self.run_id, self.site.name, sorted(all_links),
+                                        listings_complete, self.listing_cards)
+        else:
+            all_links, listings_complete = set(known[0]), known[1]
+            self.listing_cards = self.frontier.cards(self.run_id, self.site.name)
+            logger.info(f"Resuming run {self.run_id}: {len(all_links)} vehicle links from the frontier")
         
         if self.debug_mode:
             logger.info(f"\n📁 DEBUG FILES SAVED TO: debug_output/")
@@ -206,11 +503,87 @@ class VehicleScraper:
             logger.info(f"\n⚠️ Please share these HTML files or the price debugging output!")
             logger.info(f"{'='*120}\n")
         
-        for i, url in enumerate(sorted(all_links), 1):
-            logger.info(f"VEHICLE {i}/{len(all_links)}")
-            vehicle = self.scrape_vehicle(url)
-            if vehicle:
-                all_vehicles.append(vehicle)
-            time.sleep(1)
+        if self.frontier:
+            # Parsed by an interrupted slice; the sinks never confirmed them
+            for data in self.frontier.records(self.run_id, self.site.name):
+                yield Vehicle.from_dict(data)
+            todo = self.frontier.pending(self.run_id, self.site.name)
+        else:
+            todo = sorted(all_links)
         
-        return all_vehicles
+        logger.info(f"Fetching {len(todo)} vehicle pages with {self.max_workers} workers")
+        finished = False
+        # Pages that failed but may still exist; their vehicles would look sold
+        dropped = 0
+        try:
+            for url, data in zip(todo, self.imap_concurrent(self.scrape_url, todo)):
+                if data:
+                    yield Vehicle.from_dict(data)
+                elif url not in self.failures or not self.failures[url].gone:
+                    dropped += 1
+                if self.deadline and time.time() >= self.deadline:
+                    logger.info("⏱ Time budget used up; the rest of the frontier is left for the next slice")
+                    break
+            else:
+                finished = True
+            if finished and self.frontier:
+                # Pages out of retries never reach `todo` again, but their
+                # vehicles are still listed
+                exhausted = self.frontier.failed_count(self.run_id, self.site.name)
+                if exhausted:
+                    logger.warning(f"⚠️ {exhausted} vehicle page(s) failed in every slice of run {self.run_id}")
+                    finished = False
+        finally:
+            # Runs on early exit too, so a crashed consumer still keeps the
+            # cache and fingerprints of the pages fetched so far
+            self.finish_run(all_links, listings_complete and finished and not dropped)
+        if dropped:
+            logger.warning(f"⚠️ {dropped} vehicle page(s) failed; the inventory is incomplete this time")
+        self.complete = listings_complete and finished and not dropped
+    
+    def scrape_url(self, url):
+        """One vehicle URL in the current mode, recorded in the frontier if any"""
+        scrape = self.vehicle_from_listing if self.listing_only else self.scrape_vehicle
+        with self.metrics.timer('vehicle_seconds'):
+            data = scrape(url)
+        self.metrics.count('vehicles_parsed' if data else 'vehicles_failed')
+        if self.frontier:
+            if data:
+                self.frontier.mark_parsed(self.run_id, url, data)
+            else:
+                failure = self.failures.get(url)
+                self.frontier.mark_failed(self.run_id, url, failure.describe() if failure else 'no record',
+                                          gone=bool(failure and failure.gone))
+        return data
+    
+    def finish_run(self, all_links, complete):
+        if self.listing_only:
+            logger.info(f"Listing-only mode: {self.details_skipped}/{len(all_links)} "
+                        f"vehicles built from listing cards without a detail fetch")
+        
+        if self.cache:
+            self.cache.prune()
+            logger.info(self.cache.summary())
+            for name, value in self.cache.stats.items():
+                self.metrics.count(f'http_cache_{name}', value)
+        
+        if self.fingerprints:
+            # A failed listing page would make its vehicles look sold
+            if complete:
+                self.removed_urls = self.fingerprints.remove_missing(all_links)
+                logger.info(f"Removed from inventory since last run: {len(self.removed_urls)}")
+                for url in self.removed_urls:
+                    logger.info(f"  - {url}")
+            self.fingerprints.save()
+            logger.info(self.fingerprints.summary())
+            self.metrics.count('fingerprints_reused', self.fingerprints.reused)
+            self.metrics.count('fingerprints_parsed', self.fingerprints.parsed)
+        if self.listing_only:
+            self.metrics.count('details_skipped', self.details_skipped)
+        for name in ('variants', 'same_listing'):
+            self.metrics.count('links_deduplicated', self.links.stats[name], reason=name)
+
+
+# The scraper is site-agnostic through SiteProfile; the Vercel entry point
+# imports it under this name
+UniversalVehicleScraper = VehicleScraper